@@ -0,0 +1,513 @@
+"""Offline benchmark for TwitterBot: no browser, no account, no API calls.
+
+A fake WebDriver serves tweet records from benchmark_fixtures.json (snapshots recorded
+from real search timelines) with configurable latency per round trip, and a fake Gemini
+client answers with configurable latency and failure rates. The bot runs the same
+per-query cycles monitor_and_reply does, with a fixed seed, and the run reports replies
+per hour, per-stage latency percentiles, WebDriver round trips and peak memory.
+
+    python benchmark.py --cycles 3 --queries 6 --json bench.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Keep the bot quiet unless asked otherwise; failures show up in the report's counters
+os.environ.setdefault('LOG_LEVEL', 'CRITICAL')
+
+import twitter_bot as tb
+from selenium.common.exceptions import NoSuchElementException
+
+FIXTURES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_fixtures.json')
+
+
+def stable_random(*parts):
+    """A float in [0, 1) derived only from parts, so outcomes don't depend on thread scheduling."""
+    return zlib.crc32(repr(parts).encode()) / 2 ** 32
+
+
+class FakeElement:
+    """Stands in for a WebElement; every call is a round trip on its driver."""
+
+    def __init__(self, driver, kind, tweet_id=None):
+        self.driver = driver
+        self.kind = kind
+        self.tweet_id = tweet_id
+
+    def click(self):
+        self.driver.round_trip('element.click')
+        self._click()
+
+    def _click(self):
+        if self.kind == 'like':
+            self.driver.liked.add(self.tweet_id)
+        elif self.kind == 'reply':
+            self.driver.dialog = {'tweet_id': self.tweet_id, 'text': ''}
+        elif self.kind == 'submit' and self.driver.dialog and self.driver.dialog['text']:
+            self.driver.posted.append((self.driver.dialog['tweet_id'], self.driver.dialog['text']))
+            self.driver.dialog = None
+
+    def send_keys(self, *values):
+        self.driver.round_trip('element.send_keys')
+        text = ''.join(str(value) for value in values)
+        # ChromeDriver types one key event per character
+        self.driver.sleep(self.driver.keystroke_latency * len(text))
+        if self.kind == 'textbox' and self.driver.dialog is not None:
+            self.driver.dialog['text'] += text
+
+    def clear(self):
+        self.driver.round_trip('element.clear')
+
+    def is_displayed(self):
+        self.driver.round_trip('element.is_displayed')
+        return True
+
+    def is_enabled(self):
+        self.driver.round_trip('element.is_enabled')
+        if self.kind == 'submit':
+            return bool(self.driver.dialog and self.driver.dialog['text'])
+        return True
+
+    def find_elements(self, by, selector):
+        self.driver.round_trip('element.find_elements')
+        if self.kind == 'article' and 'unlike' in selector and self.tweet_id in self.driver.liked:
+            return [FakeElement(self.driver, 'unlike', self.tweet_id)]
+        return []
+
+
+class FakeDriver:
+    """Just enough of the Chrome WebDriver for the search, harvest, like and reply paths.
+
+    Each search page is a timeline built from the fixture records: page_size tweets render
+    on load and each scroll renders page_size more, keeping at most window of them in the
+    DOM like X's virtualized timeline. Repeat visits to a query show mostly new tweets
+    (fresh IDs, recycled text) with an overlap of already seen ones, and the Latest tab
+    shares half its tweets with Top.
+    """
+
+    def __init__(self, fixtures, seed=0, latency=0.005, page_load_latency=0.3, render_latency=0.1,
+                 keystroke_latency=0.002, timeline_length=30, page_size=8, window=16, overlap=0.2):
+        self.fixtures = fixtures
+        self.rng = random.Random(seed)
+        self.latency = latency
+        self.keystroke_latency = keystroke_latency
+        self.page_load_latency = page_load_latency
+        self.render_latency = render_latency
+        self.timeline_length = timeline_length
+        self.page_size = page_size
+        self.window = window
+        self.overlap = overlap
+        self.calls = Counter()
+        self.visits = Counter()
+        self.liked = set()
+        self.posted = []
+        self.dialog = None
+        self.timeline = []
+        self.cursor = 0
+        self._current_url = 'about:blank'
+        self.service = SimpleNamespace(path=None)
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds * self.rng.uniform(0.5, 1.5))
+
+    def round_trip(self, command):
+        self.calls[command] += 1
+        self.sleep(self.latency)
+
+    def build_timeline(self, query, tab):
+        visit = self.visits[(query, tab)]
+        self.visits[(query, tab)] += 1
+        key = zlib.crc32(query.encode())
+        fresh_per_visit = max(1, int(self.timeline_length * (1 - self.overlap)))
+        first = visit * fresh_per_visit + (self.timeline_length // 2 if tab == 'live' else 0)
+        timeline = []
+        for position in range(first, first + self.timeline_length):
+            record = self.fixtures[(key + position) % len(self.fixtures)]
+            timeline.append(dict(record, id=f"{key}{position:06d}"))
+        return timeline
+
+    def rendered(self):
+        return self.timeline[max(0, self.cursor - self.window):self.cursor]
+
+    def snapshot(self):
+        return [
+            dict(tweet,
+                 liked=tweet['liked'] or tweet['id'] in self.liked,
+                 element=FakeElement(self, 'article', tweet['id']),
+                 like_button=FakeElement(self, 'like', tweet['id']),
+                 reply_button=FakeElement(self, 'reply', tweet['id']))
+            for tweet in self.rendered()
+        ]
+
+    # WebDriver API
+
+    @property
+    def current_url(self):
+        self.round_trip('current_url')
+        return self._current_url
+
+    def get(self, url):
+        self.round_trip('get')
+        self.sleep(self.page_load_latency)
+        self._current_url = url
+        self.dialog = None
+        parsed = urlparse(url)
+        if parsed.path == '/search':
+            params = parse_qs(parsed.query)
+            self.timeline = self.build_timeline(params['q'][0], params.get('f', ['top'])[0])
+            self.cursor = self.page_size
+        else:
+            self.timeline = []
+            self.cursor = 0
+
+    def execute_script(self, script, *args):
+        self.round_trip('execute_script')
+        if script == tb.TWEET_SNAPSHOT_JS:
+            return self.snapshot()
+        if 'document.readyState' in script:
+            return 'complete'
+        if script == tb.PAGE_STATS_JS:
+            return {'dom_ready': self.page_load_latency, 'load': None, 'js_heap_bytes': None,
+                    'dom_nodes': 400 + 60 * len(self.rendered()), 'transferred_bytes': None}
+        if 'innerText' in script:
+            return self.dialog['text'] if self.dialog and args[0].kind == 'textbox' else ''
+        if 'click()' in script:
+            args[0]._click()
+        return None
+
+    def execute_async_script(self, script, *args):
+        self.round_trip('execute_async_script')
+        if script == tb.SCROLL_AND_SNAPSHOT_JS:
+            if self.cursor < len(self.timeline):
+                self.sleep(self.render_latency)
+                self.cursor = min(self.cursor + self.page_size, len(self.timeline))
+            return self.snapshot()
+        if script == tb.WAIT_FOR_SELECTOR_JS:
+            return True
+        return None
+
+    def find_elements(self, by, selector):
+        self.round_trip('find_elements')
+        if 'article' in selector:
+            return [FakeElement(self, 'article', tweet['id']) for tweet in self.rendered()]
+        return []
+
+    def find_element(self, by, selector):
+        self.round_trip('find_element')
+        if self.dialog is not None:
+            if 'textbox' in selector:
+                return FakeElement(self, 'textbox', self.dialog['tweet_id'])
+            if 'tweetButton' in selector:
+                return FakeElement(self, 'submit', self.dialog['tweet_id'])
+        raise NoSuchElementException(selector)
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.round_trip(f'cdp.{cmd}')
+        if cmd == 'Input.insertText' and self.dialog is not None:
+            self.dialog['text'] += params['text']
+        return {}
+
+    def set_script_timeout(self, seconds):
+        self.round_trip('set_script_timeout')
+
+    def get_cookies(self):
+        self.round_trip('get_cookies')
+        return []
+
+    def add_cookie(self, cookie):
+        self.round_trip('add_cookie')
+
+    def quit(self):
+        pass
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    """Answers generate_content like Gemini: plain text, or a JSON array when a response schema is set.
+
+    Each call takes latency (jittered +/-50%) plus per_tweet_latency for every tweet in it.
+    failure_rate of calls raise, and drop_rate of batched tweets are missing from the answer.
+    """
+
+    TWEET_ID_RE = re.compile(r'tweet_id: (\S+) \|')
+    TWEET_TEXT_RE = re.compile(r'Tweet to respond to: "(.*)"', re.DOTALL)
+
+    def __init__(self, seed=0, latency=0.4, per_tweet_latency=0.05, failure_rate=0.05, drop_rate=0.05):
+        self.seed = seed
+        self.latency = latency
+        self.per_tweet_latency = per_tweet_latency
+        self.failure_rate = failure_rate
+        self.drop_rate = drop_rate
+        self.lock = threading.Lock()
+        self.attempts = Counter()
+        self.calls = 0
+        self.failures = 0
+
+    def reply_for(self, key):
+        words = re.sub(r'[^A-Za-z0-9 ]', '', key).split()[:4]
+        return f"Interesting point on {' '.join(words) or 'this'}, curious how it holds up at scale."
+
+    def generate_content(self, model, contents, config=None):
+        tweet_ids = self.TWEET_ID_RE.findall(contents)
+        match = self.TWEET_TEXT_RE.search(contents)
+        key = tuple(tweet_ids) if tweet_ids else (match.group(1) if match else contents)
+        with self.lock:
+            self.calls += 1
+            attempt = self.attempts[key]
+            self.attempts[key] += 1
+        jitter = stable_random(self.seed, 'latency', key, attempt)
+        time.sleep(self.latency * (0.5 + jitter) + self.per_tweet_latency * max(len(tweet_ids), 1))
+        if stable_random(self.seed, 'failure', key, attempt) < self.failure_rate:
+            with self.lock:
+                self.failures += 1
+            raise RuntimeError("simulated Gemini error")
+        if config and config.get('response_mime_type') == 'application/json':
+            return FakeResponse(json.dumps([
+                {'tweet_id': tweet_id, 'reply': self.reply_for(tweet_id)}
+                for tweet_id in tweet_ids
+                if stable_random(self.seed, 'drop', tweet_id) >= self.drop_rate
+            ]))
+        return FakeResponse(f'"{self.reply_for(key)}"')
+
+
+class FakeGenaiClient:
+    def __init__(self, models):
+        self.models = models
+
+
+@contextmanager
+def fake_backends(driver, models):
+    """Point the bot module's webdriver and genai at the fakes for the duration of a run."""
+    tb.import_selenium()
+    real_webdriver, real_genai = tb.webdriver, tb.genai
+    tb.webdriver = SimpleNamespace(Chrome=lambda options=None, service=None: driver,
+                                   ChromeOptions=real_webdriver.ChromeOptions)
+    tb.genai = SimpleNamespace(Client=lambda api_key=None: FakeGenaiClient(models))
+    try:
+        yield
+    finally:
+        tb.webdriver, tb.genai = real_webdriver, real_genai
+
+
+# Bot settings that importing twitter_bot may have loaded from .env; a run clears them so
+# results don't depend on local configuration (logging settings are left alone)
+LOCAL_CONFIG_ENV = (
+    'ACCOUNTS_FILE', 'ALLOWLIST_FILE', 'BLOCKLIST_FILE', 'BROWSER_MODE', 'CHROMEDRIVER_PATH',
+    'CHROME_DEBUGGER_ADDRESS', 'COOKIES_FILE', 'METRICS_FILE', 'MUTE_RULES_FILE', 'PACING_SCALE',
+    'PROCESSED_DB_FILE', 'RANKER', 'RATE_LIMITS', 'REPLY_ASCII_ONLY', 'SEARCH_OPERATORS',
+    'TWITTER_PASSWORD', 'TWITTER_USERNAME', 'WATCHDOG_LIMITS',
+)
+
+
+@contextmanager
+def isolated_environment(tmp):
+    """Clear local bot configuration and point every file the bot writes into tmp, restoring os.environ afterwards."""
+    saved = dict(os.environ)
+    for name in LOCAL_CONFIG_ENV:
+        os.environ.pop(name, None)
+    os.environ.update({
+        'GEMINI_API_KEY': 'benchmark',
+        'DRIVER_CACHE_FILE': os.path.join(tmp, 'driver_cache.json'),
+        'QUERY_STATS_FILE': os.path.join(tmp, 'query_stats.json'),
+    })
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+
+def percentile(samples, q):
+    return samples[min(int(q * len(samples)), len(samples) - 1)] if samples else 0.0
+
+
+def run_benchmark(fixtures, queries, cycles=2, seed=42, driver_options=None, llm_options=None,
+                  pacing_scale=0.0, rate_limits=None, batch_size=5, reply_cache=True, trace_memory=False):
+    """Run cycles over queries against the fakes and return the report dict."""
+    random.seed(seed)
+    driver = FakeDriver(fixtures, seed=seed, **(driver_options or {}))
+    models = FakeModels(seed=seed, **(llm_options or {}))
+    tb.configure_logging()
+
+    with tempfile.TemporaryDirectory() as tmp, isolated_environment(tmp), fake_backends(driver, models):
+        # tracemalloc slows every allocation, so it would skew the latencies being measured
+        if trace_memory:
+            tracemalloc.start()
+        peak_memory = None
+        bot = tb.TwitterBot(
+            username='mohit_nagaraj',
+            password='benchmark',
+            cookies_file=os.path.join(tmp, 'cookies.json'),
+            chrome_profile=os.path.join(tmp, 'chrome_profile'),
+            processed_tweets=tb.ProcessedTweetStore(os.path.join(tmp, 'processed.db')),
+            # Exported after every query; keep it away from the live bot's METRICS_FILE
+            metrics_file=os.path.join(tmp, 'metrics.json'),
+            debugger_address='',
+        )
+        try:
+            # Sessions aren't part of the hot path; pacing and budget default to off so
+            # the numbers measure the bot rather than its deliberate waits
+            bot.pacing = tb.PacingPolicy(scale=pacing_scale)
+            bot.rate_limiter = tb.RateLimiter(rate_limits or {})
+            bot.ai_batch_size = batch_size
+            if not reply_cache:
+                bot.reply_cache = None
+            calls_before = sum(driver.calls.values())
+
+            totals = Counter()
+            started = time.perf_counter()
+            for _ in range(cycles):
+                for query in queries:
+                    result = bot.process_query(query)
+                    totals.update({key: result[key] for key in ('replies', 'eligible', 'page_loads')})
+                bot.processed_tweets.evict()
+            elapsed = time.perf_counter() - started
+            if trace_memory:
+                _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+            bot.cleanup()
+
+    snapshot = bot.metrics.snapshot()
+    round_trips = sum(driver.calls.values()) - calls_before
+    stages = {}
+    for stage, timing in snapshot['stages'].items():
+        stages[stage] = {
+            'count': timing['count'],
+            'mean': timing['sum'] / timing['count'],
+            'p50': timing['quantiles']['0.5'],
+            'p90': timing['quantiles']['0.9'],
+            'p99': timing['quantiles']['0.99'],
+            'max': timing['max'],
+        }
+    return {
+        'cycles': cycles,
+        'queries': len(queries),
+        'seed': seed,
+        'seconds': elapsed,
+        'replies': totals['replies'],
+        'posted': len(driver.posted),
+        'eligible': totals['eligible'],
+        'page_loads': totals['page_loads'],
+        'replies_per_hour': totals['replies'] / elapsed * 3600 if elapsed else 0.0,
+        'round_trips': round_trips,
+        'round_trips_per_reply': round_trips / totals['replies'] if totals['replies'] else None,
+        'round_trips_by_command': dict(driver.calls.most_common()),
+        'llm_calls': models.calls,
+        'llm_failures': models.failures,
+        'counters': {name: {",".join(f"{k}={v}" for k, v in entry['labels'].items()) or 'total': entry['value']
+                            for entry in series}
+                     for name, series in snapshot['counters'].items()},
+        'stages': stages,
+        'peak_traced_memory_mb': peak_memory / 2 ** 20 if peak_memory is not None else None,
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        'max_rss_mb': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10)
+                       if resource else None),
+    }
+
+
+def format_report(report):
+    lines = [
+        f"{report['cycles']} cycles x {report['queries']} queries (seed {report['seed']}) in {report['seconds']:.1f}s",
+        f"Replies: {report['replies']} ({report['posted']} posted), {report['eligible']} eligible, "
+        f"{report['page_loads']} page loads",
+        f"Replies per hour: {report['replies_per_hour']:.0f}",
+        f"WebDriver round trips: {report['round_trips']}"
+        + (f" ({report['round_trips_per_reply']:.1f} per reply)" if report['round_trips_per_reply'] else ""),
+        "  " + ", ".join(f"{command}: {count}" for command, count in report['round_trips_by_command'].items()),
+        f"LLM calls: {report['llm_calls']} ({report['llm_failures']} failed)",
+        "Memory: " + (", ".join(
+            ([f"max RSS {report['max_rss_mb']:.1f} MB"] if report['max_rss_mb'] else [])
+            + ([f"peak traced {report['peak_traced_memory_mb']:.1f} MB"]
+               if report['peak_traced_memory_mb'] is not None else [])) or "n/a"),
+        "",
+        f"{'stage':<22}{'count':>7}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)",
+    ]
+    for stage, timing in sorted(report['stages'].items()):
+        lines.append(f"{stage:<22}{timing['count']:>7}" + "".join(
+            f"{timing[key] * 1000:>9.1f}" for key in ('mean', 'p50', 'p90', 'p99', 'max')))
+    lines.append("")
+    for name, series in sorted(report['counters'].items()):
+        lines.append(f"{name}: " + ", ".join(f"{labels} {value}" for labels, value in sorted(series.items())))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TwitterBot offline against a fake browser and model.")
+    parser.add_argument('--fixtures', default=FIXTURES_FILE, help="JSON list of recorded tweet records")
+    parser.add_argument('--cycles', type=int, default=2)
+    parser.add_argument('--queries', type=int, default=4, help="use the first N search queries")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--driver-latency', type=float, default=0.005, help="seconds per WebDriver round trip")
+    parser.add_argument('--page-load-latency', type=float, default=0.3, help="extra seconds per page load")
+    parser.add_argument('--render-latency', type=float, default=0.1, help="seconds for a scroll to render tweets")
+    parser.add_argument('--keystroke-latency', type=float, default=0.002, help="seconds per character typed by send_keys")
+    parser.add_argument('--llm-latency', type=float, default=0.4, help="seconds per Gemini call")
+    parser.add_argument('--llm-per-tweet-latency', type=float, default=0.05, help="extra seconds per tweet in a call")
+    parser.add_argument('--llm-failure-rate', type=float, default=0.05)
+    parser.add_argument('--llm-drop-rate', type=float, default=0.05, help="share of tweets missing from batch answers")
+    parser.add_argument('--batch-size', type=int, default=5)
+    parser.add_argument('--no-reply-cache', action='store_true')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="report the tracemalloc peak too (slows the run, so latencies are skewed)")
+    parser.add_argument('--pacing-scale', type=float, default=0.0, help="human-like pauses (0 disables them)")
+    parser.add_argument('--rate-limits', help="RATE_LIMITS-style JSON budget (default: unlimited)")
+    parser.add_argument('--json', help="also write the report to this file")
+    args = parser.parse_args()
+
+    with open(args.fixtures, 'r') as f:
+        fixtures = json.load(f)
+    report = run_benchmark(
+        fixtures,
+        tb.TECH_SEARCH_QUERIES[:args.queries],
+        cycles=args.cycles,
+        seed=args.seed,
+        driver_options={
+            'latency': args.driver_latency,
+            'page_load_latency': args.page_load_latency,
+            'render_latency': args.render_latency,
+            'keystroke_latency': args.keystroke_latency,
+        },
+        llm_options={
+            'latency': args.llm_latency,
+            'per_tweet_latency': args.llm_per_tweet_latency,
+            'failure_rate': args.llm_failure_rate,
+            'drop_rate': args.llm_drop_rate,
+        },
+        pacing_scale=args.pacing_scale,
+        rate_limits=json.loads(args.rate_limits) if args.rate_limits else None,
+        batch_size=args.batch_size,
+        reply_cache=not args.no_reply_cache,
+        trace_memory=args.trace_memory,
+    )
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twitter_bot import ReplyCache  # noqa: E402
+
+FIXTURES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark_fixtures.json')
+
+with open(FIXTURES_FILE, 'r') as f:
+    TEXTS = {record['id'][-2:]: record['text'] for record in json.load(f)}
+
+# Near-duplicates recorded in the fixtures: a promo pasted with a different ending, and a
+# tweet reposted with different punctuation
+WEBINAR, WEBINAR_IN_BIO = TEXTS['05'], TEXTS['06']
+AWS_BILL, AWS_BILL_REPOST = TEXTS['03'], TEXTS['23']
+YEAR_2025 = "What's your favorite resource for learning Kubernetes and containers in 2025?"
+YEAR_2024 = "What's your favorite resource for learning Kubernetes and containers in 2024?"
+
+
+def distance(cache, a, b):
+    return bin(cache.simhash(cache.normalize(a)) ^ cache.simhash(cache.normalize(b))).count('1')
+
+
+def test_normalize_strips_urls_hashtags_and_punctuation():
+    assert ReplyCache.normalize("Check THIS out!! https://t.co/abc #DevOps  @friend\n") == "check this out @friend"
+    assert ReplyCache.normalize(AWS_BILL) == ReplyCache.normalize(AWS_BILL_REPOST)
+    assert ReplyCache.normalize("#webdev https://x.com") == ""
+
+
+def test_simhash_is_stable_and_word_order_independent():
+    assert ReplyCache.simhash("docker builds are slow") == ReplyCache.simhash("docker builds are slow")
+    assert ReplyCache.simhash("docker builds are slow") == ReplyCache.simhash("slow are builds docker")
+    assert 0 <= ReplyCache.simhash("docker") < 2 ** 64
+
+
+def test_simhash_near_duplicates_are_within_max_distance():
+    cache = ReplyCache()
+    assert distance(cache, WEBINAR, WEBINAR_IN_BIO) <= cache.max_distance
+    assert distance(cache, YEAR_2025, YEAR_2024) <= cache.max_distance
+
+
+def test_simhash_unrelated_fixtures_are_far_apart():
+    cache = ReplyCache()
+    texts = sorted({text for key, text in TEXTS.items() if text and key not in ('06', '23')})
+    for i, a in enumerate(texts):
+        for b in texts[i + 1:]:
+            assert distance(cache, a, b) > cache.max_distance, (a, b)
+
+
+def test_get_matches_fixture_near_duplicates():
+    cache = ReplyCache(repeat_interval=0)
+    cache.put(WEBINAR, "Hard pass on webinars, show me the repo")
+    cache.put(YEAR_2025, "The official docs and a cluster you can break")
+    assert cache.get(WEBINAR_IN_BIO) == "Hard pass on webinars, show me the repo"
+    assert cache.get(YEAR_2024) == "The official docs and a cluster you can break"
+    assert cache.get(TEXTS['02']) is None
+    assert cache.stats()['generations_saved'] == 2
+
+
+def test_get_adds_variants_then_rotates_between_them():
+    cache = ReplyCache(max_variants=2)
+    assert cache.get(WEBINAR) is None
+    cache.put(WEBINAR, "first")
+    # Seen again right away: ask for a second variant rather than repeat "first"
+    assert cache.get(WEBINAR_IN_BIO) is None
+    cache.put(WEBINAR_IN_BIO, "second")
+    served = [cache.get(WEBINAR) for _ in range(4)]
+    assert served == ["first", "second", "first", "second"]
+    stats = cache.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 5
+    assert stats['variants_added'] == 1
+    assert stats['generations_saved'] == 4
+
+
+def test_put_keeps_at_most_max_variants():
+    cache = ReplyCache(max_variants=2, repeat_interval=0)
+    for reply in ("one", "two", "three"):
+        cache.put(WEBINAR, reply)
+    (entry,) = cache.entries.values()
+    assert sorted(v['reply'] for v in entry['variants']) == ["three", "two"]
+
+
+def test_entries_expire_and_evict_least_recently_used():
+    cache = ReplyCache(ttl=0)
+    cache.put(WEBINAR, "gone")
+    assert cache.get(WEBINAR) is None
+    assert cache.stats()['entries'] == 0
+
+    cache = ReplyCache(max_entries=1, repeat_interval=0)
+    cache.put(WEBINAR, "old")
+    cache.put(YEAR_2025, "new")
+    assert cache.get(WEBINAR) is None
+    assert cache.get(YEAR_2025) == "new"
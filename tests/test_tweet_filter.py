@@ -0,0 +1,120 @@
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twitter_bot import TweetFilter  # noqa: E402
+
+
+def make_filter(tmp_path, mute_rules, blocked=(), allowed=()):
+    files = {}
+    for name, lines in (('muted', mute_rules), ('blocked', blocked), ('allowed', allowed)):
+        path = tmp_path / f"{name}.txt"
+        path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+        files[name] = str(path)
+    return TweetFilter(blocklist_file=files['blocked'], allowlist_file=files['allowed'],
+                       mute_rules_file=files['muted'])
+
+
+def check(tweet_filter, text, author='someone', handles=None):
+    return tweet_filter.check({'author': author, 'handles': handles or [author], 'text': text})
+
+
+def test_comments_and_blank_lines_are_ignored(tmp_path):
+    tweet_filter = make_filter(tmp_path, ["# giveaways", "", "#", "airdrop"])
+    assert tweet_filter.matcher.pattern.count('keyword') == 1
+    assert check(tweet_filter, "Free airdrop today") == ('muted', 'keyword airdrop')
+    assert check(tweet_filter, "giveaways galore") is None
+
+
+def test_keywords_match_whole_words_case_insensitively(tmp_path):
+    tweet_filter = make_filter(tmp_path, ["crypto", "c++", "#webdev"])
+    assert check(tweet_filter, "CRYPTO is back") == ('muted', 'keyword crypto')
+    assert check(tweet_filter, "cryptography is hard") is None
+    assert check(tweet_filter, "Learning C++ this week") == ('muted', 'keyword c++')
+    assert check(tweet_filter, "Learning c++, rust and go") == ('muted', 'keyword c++')
+    assert check(tweet_filter, "abc++ is not a language") is None
+    assert check(tweet_filter, "c++11 features") is None
+    assert check(tweet_filter, "Loving #WebDev lately!") == ('muted', 'keyword #webdev')
+    assert check(tweet_filter, "#webdevelopment tips") is None
+    assert check(tweet_filter, "webdev without the hashtag") is None
+
+
+def test_scoped_flags_stay_with_their_rule(tmp_path):
+    tweet_filter = make_filter(tmp_path, ["re:(?s)buy.now", "re:sign.up"])
+    assert check(tweet_filter, "buy\nnow") == ('muted', 'regex (?s)buy.now')
+    assert check(tweet_filter, "sign-up today") == ('muted', 'regex sign.up')
+    assert check(tweet_filter, "sign\nup today") is None
+
+
+def test_global_ignorecase_flag_is_dropped(tmp_path):
+    tweet_filter = make_filter(tmp_path, ["re:(?i)Giveaway", "re:(?si)free.stuff"])
+    assert [compiled.pattern for _, compiled in tweet_filter.patterns] == ["Giveaway", "(?s:free.stuff)"]
+    assert check(tweet_filter, "GIVEAWAY time") == ('muted', 'regex (?i)Giveaway')
+    assert check(tweet_filter, "FREE\nSTUFF") == ('muted', 'regex (?si)free.stuff')
+
+
+def test_rules_that_cannot_be_combined_are_skipped(tmp_path, caplog):
+    rules = [
+        "re:(?P<keyword>spam)",
+        "re:(?P<pattern>spam)",
+        "re:(?P<promo>deal)",
+        "re:(?P<promo>offer)",
+        r"re:(ha)\1",
+        "re:x*",
+        "re:(unclosed",
+        "re:scam",
+    ]
+    with caplog.at_level(logging.ERROR, logger="twitter_bot"):
+        tweet_filter = make_filter(tmp_path, rules)
+    assert [rule for rule, _ in tweet_filter.patterns] == ["(?P<promo>deal)", "scam"]
+    skipped = [record.getMessage() for record in caplog.records]
+    assert len(skipped) == 6
+    assert all("muted.txt" in message for message in skipped)
+    assert [message.split("muted.txt:")[1].split(":")[0] for message in skipped] == ["1", "2", "4", "5", "6", "7"]
+    assert "reserved or used by another rule" in skipped[0]
+    assert "reserved or used by another rule" in skipped[2]
+    assert "numbered backreferences" in skipped[3]
+    assert "matches empty text" in skipped[4]
+    assert check(tweet_filter, "a great offer") is None
+    assert check(tweet_filter, "hahaha") is None
+    assert check(tweet_filter, "nothing to see") is None
+    assert check(tweet_filter, "best deal") == ('muted', 'regex (?P<promo>deal)')
+
+
+def test_reported_rule_names_what_fired(tmp_path):
+    tweet_filter = make_filter(tmp_path, ["nft", r"re:\d+x gains", "re:follow (me|back)"],
+                               blocked=["@SpamBot"], allowed=["friend"])
+    # The earliest match in the text is reported, whether keyword or regex
+    assert check(tweet_filter, "this nft has 10x gains") == ('muted', 'keyword nft')
+    assert check(tweet_filter, "10x gains on this nft") == ('muted', r'regex \d+x gains')
+    assert check(tweet_filter, "pls follow back") == ('muted', 'regex follow (me|back)')
+    assert check(tweet_filter, "hello", author='spambot') == ('blocked', 'handle @spambot')
+    assert check(tweet_filter, "thanks @SpamBot") == ('blocked', 'mention @spambot')
+    assert check(tweet_filter, "nft drop", author='friend') is None
+    assert tweet_filter.is_priority({'author': 'friend'})
+    assert tweet_filter.hits['keyword nft'] == 1
+    assert tweet_filter.hits[r'regex \d+x gains'] == 1
+    assert tweet_filter.hits['handle @spambot'] == 1
+
+
+def test_reload_picks_up_edits(tmp_path):
+    tweet_filter = make_filter(tmp_path, ["crypto"])
+    assert not tweet_filter.reload_if_changed()
+    path = tmp_path / "muted.txt"
+    path.write_text("crypto\nre:moon(shot)?\n", encoding='utf-8')
+    os.utime(path, (os.stat(path).st_atime, os.stat(path).st_mtime + 10))
+    assert tweet_filter.reload_if_changed()
+    assert check(tweet_filter, "to the moonshot") == ('muted', 'regex moon(shot)?')
+
+
+def test_failed_reload_keeps_the_current_rules(tmp_path, caplog):
+    tweet_filter = make_filter(tmp_path, ["crypto", "re:moon(shot)?"], blocked=["spambot"])
+    (tmp_path / "muted.txt").unlink()
+    with caplog.at_level(logging.ERROR, logger="twitter_bot"):
+        assert not tweet_filter.reload_if_changed()
+    assert "keeping the current ones" in caplog.text
+    assert check(tweet_filter, "crypto news") == ('muted', 'keyword crypto')
+    assert check(tweet_filter, "moonshot") == ('muted', 'regex moon(shot)?')
+    assert check(tweet_filter, "hi", author='spambot') == ('blocked', 'handle @spambot')
@@ -3,754 +3,2837 @@ import json
 import time
 import random
 import sys
-import traceback
-
-print("=== Importing required modules ===")
-
-try:
-    print("Importing dotenv...")
-    from dotenv import load_dotenv
-    print("✓ dotenv imported successfully")
-except Exception as e:
-    print(f"❌ Failed to import dotenv: {e}")
-    input("Press Enter to exit...")
-    sys.exit(1)
-
-try:
-    print("Importing selenium modules...")
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service
-    from webdriver_manager.chrome import ChromeDriverManager
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.common.keys import Keys
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException, NoSuchElementException
-    print("✓ selenium modules imported successfully")
-except Exception as e:
-    print(f"❌ Failed to import selenium modules: {e}")
-    input("Press Enter to exit...")
-    sys.exit(1)
-
-try:
-    print("Importing datetime...")
-    from datetime import datetime, timedelta
-    print("✓ datetime imported successfully")
-except Exception as e:
-    print(f"❌ Failed to import datetime: {e}")
-    input("Press Enter to exit...")
-    sys.exit(1)
-
-try:
-    print("Importing google.genai...")
-    import google.genai as genai
-    print("✓ google.genai imported successfully")
-except Exception as e:
-    print(f"❌ Failed to import google.genai: {e}")
-    print("Please install it with: pip install google-genai")
-    input("Press Enter to exit...")
-    sys.exit(1)
-
-print("\n=== Starting Twitter Bot ===")
-print(f"Python version: {sys.version}")
-print(f"Current working directory: {os.getcwd()}")
+import logging
+from contextlib import contextmanager
+import sqlite3
+import hashlib
+import math
+from urllib.parse import urlencode, quote
+import re
+import itertools
+from datetime import datetime
+import threading
+from collections import Counter, deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import queue
+from multiprocessing.managers import BaseManager, BaseProxy
+
+from dotenv import load_dotenv
+# Exceptions are cheap to import; the webdriver modules and google.genai are loaded on first use
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+
+# Start of the current bot's startup, for reporting time to first search; the first bot in
+# a process counts the module import too, restarted bots and workers reset it
+STARTUP_STARTED = time.perf_counter()
+
+
+def mark_startup():
+    global STARTUP_STARTED
+    STARTUP_STARTED = time.perf_counter()
 
 # Load environment variables
 load_dotenv()
-print("Environment variables loaded")
-
-# Check required environment variables
-env_vars = {
-    'TWITTER_USERNAME': os.getenv('TWITTER_USERNAME'),
-    'TWITTER_PASSWORD': os.getenv('TWITTER_PASSWORD'),
-    'GEMINI_API_KEY': os.getenv('GEMINI_API_KEY'),
-    'COOKIES_FILE': os.getenv('COOKIES_FILE')
+
+# Set by import_selenium(), import_genai() and import_numpy()
+webdriver = Service = By = Keys = WebDriverWait = EC = None
+genai = None
+np = None
+
+
+def import_selenium():
+    """Import the selenium webdriver modules (most of selenium's import time) on first use."""
+    global webdriver, Service, By, Keys, WebDriverWait, EC
+    if WebDriverWait is None:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.keys import Keys
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+
+def import_genai():
+    """Import google.genai on first use; it takes most of a second, so TwitterBot loads it while Chrome starts."""
+    global genai
+    if genai is None:
+        try:
+            import google.genai as genai
+        except ImportError as e:
+            raise ImportError(f"{e}. Please install it with: pip install google-genai") from e
+    return genai
+
+
+def import_numpy():
+    """Import numpy (for the relevance ranker) on first use, keeping it out of startup."""
+    global np
+    if np is None:
+        import numpy as np
+    return np
+
+
+def create_genai_client(api_key):
+    return import_genai().Client(api_key=api_key)
+
+
+log = logging.getLogger("twitter_bot")
+
+# Attributes every LogRecord has; anything else was passed through extra= and is a structured field
+_STANDARD_LOG_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line: time, level, process, message and any extra= fields."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            'level': record.levelname.lower(),
+            'process': record.processName,
+            'message': record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _STANDARD_LOG_ATTRS})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging():
+    """Set up the bot's logger from LOG_LEVEL (default INFO) and LOG_FORMAT ("text" or "json")."""
+    handler = logging.StreamHandler(sys.stdout)
+    if os.getenv('LOG_FORMAT', 'text').lower() == 'json':
+        handler.setFormatter(JsonLogFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(processName)s %(message)s", "%H:%M:%S"))
+    log.handlers[:] = [handler]
+    log.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    log.propagate = False
+
+
+def check_environment(keys):
+    """Print the status of the required environment variables and exit if any are missing."""
+    env_vars = {key: os.getenv(key) for key in keys}
+
+    print("\n=== Environment Variables Status ===")
+    for key, value in env_vars.items():
+        if value:
+            if 'PASSWORD' in key or 'API_KEY' in key:
+                print(f"{key}: {'*' * 8} (hidden)")
+            else:
+                print(f"{key}: {value}")
+        else:
+            print(f"{key}: NOT SET ⚠️")
+
+    missing_vars = [k for k, v in env_vars.items() if not v]
+    if missing_vars:
+        print(f"\n⚠️ Missing required environment variables: {', '.join(missing_vars)}")
+        print("Please check your .env file")
+        sys.exit(1)
+
+
+GEMINI_MODEL = "gemini-2.0-flash-exp"
+
+# Posted when generation fails; never cached
+FALLBACK_REPLY = "cool"
+
+TECH_SEARCH_QUERIES = [
+    "Next.js", "Node.js", "Express.js", "Golang", "CI/CD", "Docker",
+    "#fullstackdev", "#webdev", "#softwareengineering",
+    "cloud computing", "#AWS", "#GCP", "#Azure", "#DevOps",
+    "serverless", "microservices", "kubernetes", "reactjs"
+]
+
+# Search tab name -> value of the f= search URL parameter
+SEARCH_TABS = {
+    "top": "top",
+    "latest": "live",
+}
+
+# Action budget per account; override with a JSON object in RATE_LIMITS
+DEFAULT_RATE_LIMITS = {
+    "search": {"per_hour": 120, "per_day": 1500, "spacing": 3},
+    "like": {"per_hour": 60, "per_day": 500, "spacing": 5},
+    "reply": {"per_hour": 30, "per_day": 200, "spacing": 20},
 }
 
-print("\n=== Environment Variables Status ===")
-for key, value in env_vars.items():
-    if value:
-        if 'PASSWORD' in key or 'API_KEY' in key:
-            print(f"{key}: {'*' * 8} (hidden)")
+# Chrome is recycled when the renderer's JS heap or DOM grows past these, or when the
+# driver is older than max_age_hours; override with WATCHDOG_LIMITS (JSON)
+DEFAULT_WATCHDOG_LIMITS = {"js_heap_mb": 1024, "dom_nodes": 150000, "max_age_hours": 6}
+
+# Always blocked, on top of BLOCKLIST_FILE
+DEFAULT_BLOCKED_HANDLES = ("elonmusk", "skysingh04")
+
+# Local pre-ranking before generation: only the top_k tweets of a page scoring at least
+# threshold go to the LLM; override with RANKER (JSON, may also set "weights")
+DEFAULT_RANKER_SETTINGS = {"threshold": 0.3, "top_k": 10}
+# Share of relevance that text length and freshness can take off, and the weight of spam markers
+DEFAULT_RANKER_WEIGHTS = {"length": 0.3, "freshness": 0.3, "spam": 1.0}
+
+# What the persona can talk about; scored against tweets together with the current query
+RANKER_TOPICS = TECH_SEARCH_QUERIES + [
+    "javascript", "typescript", "react", "node", "express", "go", "generics", "python", "api",
+    "backend", "frontend", "css", "component", "database", "sql", "postgresql", "mongodb", "redis",
+    "graphql", "cloud", "deploy", "infrastructure", "devops", "sre", "on-call", "aws", "gcp", "azure",
+    "docker", "container", "kubectl", "pipeline", "build", "test", "open source", "code review",
+    "software engineering", "web development", "full stack", "production", "latency", "cold start",
+]
+
+# Promotion and engagement-bait phrases that count against a tweet
+RANKER_SPAM_TERMS = [
+    "giveaway", "airdrop", "free webinar", "register now", "limited seats", "link in bio",
+    "dm me", "follow and retweet", "like and retweet", "retweet to win", "promo code",
+    "discount", "sign up now", "click the link", "crypto", "nft", "whitelist", "100x",
+]
+
+# Appended to every query so X drops replies and non-English tweets server-side
+DEFAULT_SEARCH_OPERATORS = "-filter:replies lang:en"
+
+REPLY_TONES = [
+    "professional and insightful",
+    "light-hearted and witty",
+    "assertive and confident",
+    "knowledgeable and helpful",
+    "slightly egoistic but still professional"
+]
+
+# Runs inside the page and snapshots every rendered tweet in one round trip.
+# Each record carries everything the filters need plus direct references to the
+# buttons we may click, so no further WebDriver calls are needed to evaluate it.
+TWEET_SNAPSHOT_FUNCTIONS = r"""
+function handleFromHref(href) {
+    if (!href) return null;
+    var path = href;
+    var m = href.match(/^https?:\/\/(?:www\.|mobile\.)?(?:x|twitter)\.com(\/[^#]*)?$/i);
+    if (m) path = m[1] || '/';
+    if (path.charAt(0) !== '/') return null;
+    path = path.split('?')[0];
+    if (path.indexOf('/status/') !== -1 || path.indexOf('/search') === 0) return null;
+    var parts = path.split('/').filter(Boolean);
+    return parts.length ? parts[0].toLowerCase() : null;
+}
+function statusFromHref(href) {
+    if (!href || href.indexOf('/status/') === -1) return null;
+    var path = href.replace(/^https?:\/\/[^\/]+/i, '');
+    var m = path.match(/^\/([^\/?#]+)\/status\/(\d+)/);
+    return m ? {author: m[1].toLowerCase(), id: m[2]} : null;
+}
+function snapshotTweets() {
+    var records = [];
+    var articles = document.querySelectorAll('article[data-testid="tweet"]');
+    for (var i = 0; i < articles.length; i++) {
+        var article = articles[i];
+        var anchors = article.querySelectorAll('a[href]');
+        var timeLink = article.querySelector('a[href*="/status/"] time');
+        var status = timeLink ? statusFromHref(timeLink.parentElement.getAttribute('href')) : null;
+        var handles = [];
+        for (var j = 0; j < anchors.length; j++) {
+            var href = anchors[j].getAttribute('href');
+            if (!status) status = statusFromHref(href);
+            var handle = handleFromHref(href);
+            if (handle && handles.indexOf(handle) === -1) handles.push(handle);
+        }
+        var textElem = article.querySelector('[data-testid="tweetText"]');
+        var replyMarker = document.evaluate(
+            ".//*[contains(text(), 'Replying to')]", article, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        records.push({
+            index: i,
+            id: status ? status.id : null,
+            author: status ? status.author : null,
+            handles: handles,
+            text: textElem ? textElem.innerText.trim() : '',
+            created_at: timeLink ? timeLink.getAttribute('datetime') : null,
+            liked: article.querySelector('[data-testid="unlike"]') !== null,
+            is_reply: replyMarker !== null,
+            element: article,
+            like_button: article.querySelector('[data-testid="like"]'),
+            reply_button: article.querySelector('[data-testid="reply"]')
+        });
+    }
+    return records;
+}
+"""
+
+TWEET_SNAPSHOT_JS = TWEET_SNAPSHOT_FUNCTIONS + "return snapshotTweets();"
+
+# Async: scrolls the timeline by most of a viewport, waits (MutationObserver) until a
+# tweet we haven't seen yet renders or the timeout passes, then returns a snapshot.
+SCROLL_AND_SNAPSHOT_JS = TWEET_SNAPSHOT_FUNCTIONS + r"""
+var seen = {}, timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+arguments[0].forEach(function (id) { seen[id] = true; });
+function hasNewTweet() {
+    var links = document.querySelectorAll('article[data-testid="tweet"] a[href*="/status/"]');
+    for (var i = 0; i < links.length; i++) {
+        var status = statusFromHref(links[i].getAttribute('href'));
+        if (status && !seen[status.id]) return true;
+    }
+    return false;
+}
+var timer = null;
+var observer = new MutationObserver(function () {
+    if (hasNewTweet()) {
+        observer.disconnect();
+        clearTimeout(timer);
+        // Give the rest of the batch a moment to render before snapshotting
+        setTimeout(function () { done(snapshotTweets()); }, 250);
+    }
+});
+window.scrollBy(0, Math.round(window.innerHeight * 0.9));
+if (hasNewTweet()) {
+    done(snapshotTweets());
+} else {
+    observer.observe(document.body, {childList: true, subtree: true});
+    timer = setTimeout(function () { observer.disconnect(); done(snapshotTweets()); }, timeoutMs);
+}
+"""
+
+# Resolves as soon as an element matching the selector is in the DOM (or after the
+# timeout), using a MutationObserver instead of polling from Python.
+WAIT_FOR_SELECTOR_JS = r"""
+var selector = arguments[0], timeoutMs = arguments[1], done = arguments[arguments.length - 1];
+if (document.querySelector(selector)) { done(true); return; }
+var timer = null;
+var observer = new MutationObserver(function () {
+    if (document.querySelector(selector)) {
+        observer.disconnect();
+        clearTimeout(timer);
+        done(true);
+    }
+});
+observer.observe(document.documentElement, {childList: true, subtree: true});
+timer = setTimeout(function () { observer.disconnect(); done(false); }, timeoutMs);
+"""
+
+# Present on any page of the signed-in app / on login prompts and the logged-out landing page
+LOGGED_IN_SELECTOR = '[data-testid="AppTabBar_Home_Link"], [data-testid="SideNav_AccountSwitcher_Button"]'
+LOGGED_OUT_SELECTOR = '[data-testid="loginButton"], [data-testid="login"], input[autocomplete="username"]'
+
+# Navigation timing and renderer memory for the current page, in one round trip
+PAGE_STATS_JS = r"""
+var nav = performance.getEntriesByType('navigation')[0];
+var transferred = 0;
+performance.getEntriesByType('resource').forEach(function (entry) { transferred += entry.transferSize || 0; });
+return {
+    dom_ready: nav ? nav.domContentLoadedEventEnd / 1000 : null,
+    load: nav && nav.loadEventEnd ? nav.loadEventEnd / 1000 : null,
+    js_heap_bytes: performance.memory ? performance.memory.usedJSHeapSize : null,
+    dom_nodes: document.getElementsByTagName('*').length,
+    transferred_bytes: transferred + (nav ? nav.transferSize || 0 : 0)
+};
+"""
+
+# Browser modes: "full" is a normal maximized Chrome; "lean" runs headless in a smaller
+# window and blocks what the bot never looks at (images, video, fonts)
+BROWSER_MODES = ("full", "lean")
+LEAN_WINDOW_SIZE = "1280,800"
+LEAN_BLOCKED_URLS = [
+    "*://pbs.twimg.com/*",     # tweet media, avatars, card images (served without file extensions)
+    "*://video.twimg.com/*",   # video and GIF streams
+    "*://ton.twimg.com/*",     # DM and ad media
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.m3u8", "*.m4s",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+]
+
+
+class PacingPolicy:
+    """Deliberate human-like delays, kept separate from waiting for the page to be ready.
+
+    Each kind of pause is a (min, max) range in seconds. scale multiplies every delay,
+    so PACING_SCALE=0 turns pacing off entirely (e.g. for testing) and 2 doubles it.
+    """
+
+    DEFAULT_DELAYS = {
+        'keystroke': (0.05, 0.15),
+        'before_click': (0.3, 1.0),
+        'after_failure': (2, 2),
+    }
+
+    def __init__(self, scale=1.0, **delays):
+        self.scale = scale
+        self.delays = dict(self.DEFAULT_DELAYS, **delays)
+
+    def pause(self, kind):
+        low, high = self.delays[kind]
+        delay = random.uniform(low, high) * self.scale
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class Metrics:
+    """Counters and per-stage timings for the hot path, exported as a Prometheus textfile or JSON.
+
+    span(stage) times a block; inc(name, **labels) bumps a counter and set(name, value, **labels)
+    records a gauge's latest value. Timings keep count, sum and max plus the last sample_size
+    samples for percentiles. export() writes the snapshot to path atomically: Prometheus text
+    format if it ends in .prom, JSON otherwise.
+    """
+
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, path=None, prefix='twitter_bot', sample_size=1000):
+        self.path = path
+        self.prefix = prefix
+        self.sample_size = sample_size
+        self.started = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.timings = {}
+        self.lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            timing = self.timings.get(stage)
+            if timing is None:
+                timing = self.timings[stage] = {'count': 0, 'sum': 0.0, 'max': 0.0,
+                                                'samples': deque(maxlen=self.sample_size)}
+            timing['count'] += 1
+            timing['sum'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+            timing['samples'].append(seconds)
+
+    @contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe(stage, elapsed)
+            log.debug("[span] %s took %.3fs", stage, elapsed, extra={'stage': stage, 'seconds': elapsed})
+
+    def snapshot(self):
+        with self.lock:
+            counters = {}
+            for (name, labels), value in self.counters.items():
+                counters.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+            gauges = {}
+            for (name, labels), value in self.gauges.items():
+                gauges.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+            stages = {}
+            for stage, timing in self.timings.items():
+                samples = sorted(timing['samples'])
+                stages[stage] = {
+                    'count': timing['count'],
+                    'sum': timing['sum'],
+                    'max': timing['max'],
+                    'quantiles': {str(q): samples[min(int(q * len(samples)), len(samples) - 1)]
+                                  for q in self.QUANTILES},
+                }
+        return {'uptime_seconds': time.time() - self.started, 'counters': counters, 'gauges': gauges,
+                'stages': stages}
+
+    def to_prometheus(self, snapshot):
+        lines = [f"# TYPE {self.prefix}_uptime_seconds gauge",
+                 f"{self.prefix}_uptime_seconds {snapshot['uptime_seconds']:.3f}"]
+        for kind, suffix in (('counters', '_total'), ('gauges', '')):
+            for name, series in sorted(snapshot[kind].items()):
+                metric = f"{self.prefix}_{name}{suffix}"
+                lines.append(f"# TYPE {metric} {kind[:-1]}")
+                for entry in series:
+                    labels = ",".join(f'{k}="{v}"' for k, v in entry['labels'].items())
+                    lines.append(f"{metric}{{{labels}}} {entry['value']}" if labels else f"{metric} {entry['value']}")
+        metric = f"{self.prefix}_stage_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for stage, timing in sorted(snapshot['stages'].items()):
+            for q, value in timing['quantiles'].items():
+                lines.append(f'{metric}{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {timing["sum"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {timing["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        if not self.path:
+            return
+        snapshot = self.snapshot()
+        if self.path.endswith('.prom'):
+            content = self.to_prometheus(snapshot)
         else:
-            print(f"{key}: {value}")
-    else:
-        print(f"{key}: NOT SET ⚠️")
+            content = json.dumps(snapshot, indent=2)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(content)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.warning("[Metrics] Could not write %s: %s", self.path, e)
+
+
+class RateLimiter:
+    """Token-bucket budget per action type, replacing fixed sleeps between actions.
+
+    limits maps an action ("search", "like", "reply") to per-window caps such as
+    {"per_hour": 30, "per_day": 200} plus an optional "spacing": the typical gap in
+    seconds between two such actions, jittered by +/-30%. Each window is a bucket that
+    holds at most its cap and refills continuously over the window, so acquire()
+    blocks only as long as the tightest bucket (or the spacing) requires.
+    Bucket levels are saved to state_path so restarts don't reset the budget.
+    """
+
+    WINDOWS = {'per_minute': 60, 'per_hour': 60 * 60, 'per_day': 24 * 60 * 60}
+
+    def __init__(self, limits, state_path=None):
+        self.limits = limits
+        self.state_path = state_path
+        self.lock = threading.Lock()
+        now = time.time()
+        self.buckets = {
+            action: {window: [float(cap), now] for window, cap in caps.items() if window in self.WINDOWS}
+            for action, caps in limits.items()
+        }
+        self.next_allowed = {action: 0.0 for action in limits}
+        self.throttled = {action: {'events': 0, 'seconds': 0.0} for action in limits}
+        if state_path:
+            try:
+                with open(state_path, 'r') as f:
+                    saved = json.load(f)
+                for action, windows in saved.items():
+                    for window, level in windows.items():
+                        if window in self.buckets.get(action, {}):
+                            self.buckets[action][window] = level
+            except FileNotFoundError:
+                pass
+            except (ValueError, OSError) as e:
+                log.warning("[RateLimiter] Could not read %s: %s", state_path, e)
+
+    def _refill(self, action, now):
+        for window, bucket in self.buckets[action].items():
+            cap = self.limits[action][window]
+            tokens, updated_at = bucket
+            bucket[0] = min(cap, tokens + (now - updated_at) * cap / self.WINDOWS[window])
+            bucket[1] = now
+
+    def wait_time(self, action):
+        """Seconds until action is allowed by every bucket and its spacing."""
+        now = time.time()
+        with self.lock:
+            self._refill(action, now)
+            wait = self.next_allowed[action] - now
+            for window, (tokens, _) in self.buckets[action].items():
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) * self.WINDOWS[window] / self.limits[action][window])
+            return max(wait, 0.0)
+
+    def acquire(self, action):
+        """Block until the budget allows action, then spend one token. Returns the seconds waited."""
+        if action not in self.limits:
+            return 0.0
+        waited = 0.0
+        while True:
+            wait = self.wait_time(action)
+            if wait <= 0:
+                break
+            self.throttled[action]['events'] += 1
+            self.throttled[action]['seconds'] += wait
+            if wait >= 5:
+                log.warning("[RateLimiter] %s throttled for %.0fs (%s)", action, wait, self.describe(action))
+            time.sleep(wait)
+            waited += wait
+
+        now = time.time()
+        with self.lock:
+            self._refill(action, now)
+            for bucket in self.buckets[action].values():
+                bucket[0] -= 1
+            spacing = self.limits[action].get('spacing', 0)
+            self.next_allowed[action] = now + spacing * random.uniform(0.7, 1.3)
+        self.save()
+        return waited
+
+    def remaining(self, action):
+        """Whole actions left in each window right now."""
+        now = time.time()
+        with self.lock:
+            self._refill(action, now)
+            return {window: int(tokens) for window, (tokens, _) in self.buckets[action].items()}
+
+    def describe(self, action):
+        return ", ".join(f"{window.replace('per_', '')}: {left}/{self.limits[action][window]} left"
+                         for window, left in self.remaining(action).items())
+
+    def summary(self):
+        """One line per action with remaining budget and throttling so far, for logging."""
+        return [
+            f"{action}: {self.describe(action)}; throttled {stats['events']} times for {stats['seconds']:.0f}s"
+            for action, stats in self.throttled.items()
+        ]
+
+    def save(self):
+        if not self.state_path:
+            return
+        with self.lock:
+            state = json.dumps(self.buckets)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(state)
+        os.replace(tmp_path, self.state_path)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter used as a cheap negative-lookup front for large ID sets."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class ProcessedTweetStore:
+    """SQLite-backed record of tweet IDs we have already handled, and why.
+
+    Survives restarts, evicts entries older than max_age_days or beyond max_entries
+    (oldest first), and answers membership checks from an in-memory dict. With
+    use_bloom=True the dict is replaced by a Bloom filter in front of the primary-key
+    lookup, which keeps memory flat at millions of IDs (PROCESSED_DB_BLOOM=1).
+    """
+
+    def __init__(self, path, max_entries=100000, max_age_days=30, use_bloom=False):
+        log.info("[ProcessedTweetStore] Opening %s", path)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 24 * 60 * 60
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS processed ("
+                "tweet_id TEXT PRIMARY KEY, reason TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS processed_created_at ON processed (created_at)")
+        self.use_bloom = use_bloom
+        self.index = None
+        self.bloom = None
+        self.evict()
+        self.load_index()
+        log.info("[ProcessedTweetStore] Loaded %s processed tweet IDs", len(self))
+
+    def load_index(self):
+        """(Re)build the in-memory membership index from the table."""
+        if self.use_bloom:
+            self.bloom = BloomFilter(self.max_entries)
+            for (tweet_id,) in self.conn.execute("SELECT tweet_id FROM processed"):
+                self.bloom.add(tweet_id)
+        else:
+            self.index = dict(self.conn.execute("SELECT tweet_id, reason FROM processed"))
+
+    def __contains__(self, tweet_id):
+        return self.reason(tweet_id) is not None
+
+    def __len__(self):
+        if self.index is not None:
+            return len(self.index)
+        return self.conn.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+
+    def reason(self, tweet_id):
+        """Return the recorded reason for tweet_id, or None if we have not seen it."""
+        if self.index is not None:
+            return self.index.get(tweet_id)
+        if tweet_id not in self.bloom:
+            return None
+        row = self.conn.execute("SELECT reason FROM processed WHERE tweet_id = ?", (tweet_id,)).fetchone()
+        return row[0] if row else None
+
+    def claim(self, tweet_id):
+        """Reserve tweet_id for a reply. Only one process uses this store, so unseen means ours."""
+        return tweet_id not in self
+
+    def release(self, tweet_id):
+        pass
+
+    def add(self, tweet_id, reason):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO processed (tweet_id, reason, created_at) VALUES (?, ?, ?)",
+                (tweet_id, reason, time.time())
+            )
+        if self.index is not None:
+            self.index[tweet_id] = reason
+        else:
+            self.bloom.add(tweet_id)
+
+    def evict(self):
+        """Drop entries past max_age, then the oldest ones beyond max_entries. Returns the number removed."""
+        cutoff = time.time() - self.max_age
+        expired = [row[0] for row in self.conn.execute(
+            "SELECT tweet_id FROM processed WHERE created_at < ?", (cutoff,))]
+        expired += [row[0] for row in self.conn.execute(
+            "SELECT tweet_id FROM processed WHERE created_at >= ? "
+            "ORDER BY created_at DESC LIMIT -1 OFFSET ?", (cutoff, self.max_entries))]
+        if not expired:
+            return 0
+        with self.conn:
+            self.conn.executemany("DELETE FROM processed WHERE tweet_id = ?", [(i,) for i in expired])
+        if self.index is not None:
+            for tweet_id in expired:
+                self.index.pop(tweet_id, None)
+        elif self.bloom is not None:
+            # Bloom filters can't forget, so start a fresh one without the evicted IDs
+            self.load_index()
+        log.info("[ProcessedTweetStore] Evicted %s old tweet IDs", len(expired))
+        return len(expired)
+
+    def close(self):
+        self.conn.close()
+
+
+class SharedDedupeStore:
+    """ProcessedTweetStore shared by every account in multi-account mode.
+
+    Lives in the supervisor's manager process; workers talk to it through
+    SharedDedupeProxy. claim() hands a tweet to exactly one worker until it is
+    recorded with add() or given back with release(); claims from a worker that
+    died expire after claim_ttl seconds.
+    """
+
+    def __init__(self, path, claim_ttl=15 * 60, use_bloom=False):
+        self.store = ProcessedTweetStore(path, use_bloom=use_bloom)
+        self.claim_ttl = claim_ttl
+        self.claims = {}
+        self.lock = threading.Lock()
+
+    def contains(self, tweet_id):
+        with self.lock:
+            return tweet_id in self.store
+
+    def reason(self, tweet_id):
+        with self.lock:
+            return self.store.reason(tweet_id)
+
+    def claim(self, tweet_id):
+        with self.lock:
+            now = time.time()
+            if tweet_id in self.store or now - self.claims.get(tweet_id, 0) < self.claim_ttl:
+                return False
+            self.claims[tweet_id] = now
+            return True
+
+    def release(self, tweet_id):
+        with self.lock:
+            self.claims.pop(tweet_id, None)
+
+    def add(self, tweet_id, reason):
+        with self.lock:
+            self.store.add(tweet_id, reason)
+            self.claims.pop(tweet_id, None)
+
+    def evict(self):
+        with self.lock:
+            cutoff = time.time() - self.claim_ttl
+            self.claims = {k: v for k, v in self.claims.items() if v >= cutoff}
+            return self.store.evict()
+
+    def close(self):
+        with self.lock:
+            self.store.close()
+
+
+class SharedDedupeProxy(BaseProxy):
+    """Client side of SharedDedupeStore, usable wherever a ProcessedTweetStore is expected."""
+
+    _exposed_ = ('contains', 'reason', 'claim', 'release', 'add', 'evict', 'close')
+
+    def __contains__(self, tweet_id):
+        return self._callmethod('contains', (tweet_id,))
+
+    def reason(self, tweet_id):
+        return self._callmethod('reason', (tweet_id,))
+
+    def claim(self, tweet_id):
+        return self._callmethod('claim', (tweet_id,))
+
+    def release(self, tweet_id):
+        return self._callmethod('release', (tweet_id,))
+
+    def add(self, tweet_id, reason):
+        return self._callmethod('add', (tweet_id, reason))
+
+    def evict(self):
+        return self._callmethod('evict')
+
+    def close(self):
+        # The supervisor owns the store; workers just disconnect
+        pass
+
+
+class DedupeManager(BaseManager):
+    pass
+
+
+DedupeManager.register('SharedDedupeStore', SharedDedupeStore, proxytype=SharedDedupeProxy)
+
+
+class ReplyCache:
+    """Caches generated replies by normalized tweet text, matching near-duplicates via SimHash.
+
+    Texts whose 64-bit fingerprints differ in at most max_distance bits share an entry of up
+    to max_variants replies, served in rotation; get() returns None while an entry should
+    grow another variant. Entries expire after ttl seconds, least recently used first
+    beyond max_entries.
+    """
+
+    def __init__(self, ttl=24 * 60 * 60, max_entries=5000, max_variants=3,
+                 repeat_interval=6 * 60 * 60, max_distance=12):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_variants = max_variants
+        self.repeat_interval = repeat_interval
+        self.max_distance = max_distance
+        # Split the 64 bits into max_distance + 1 bands of (nearly) equal width
+        bands = max_distance + 1
+        self.band_widths = [64 // bands + (i < 64 % bands) for i in range(bands)]
+        self.entries = OrderedDict()  # fingerprint -> entry, least recently used first
+        self.bands = [{} for _ in range(bands)]
+        self.lock = threading.Lock()
+        self.hits = 0  # lookups that matched an entry
+        self.served = 0  # ...and returned a cached reply
+        self.variants_added = 0  # ...and asked for another variant
+        self.misses = 0
+
+    @staticmethod
+    def normalize(text):
+        text = re.sub(r'https?://\S+|www\.\S+', ' ', text.lower())
+        text = re.sub(r'#\w+', ' ', text)
+        text = re.sub(r'[^\w@\s]', ' ', text)
+        return ' '.join(text.split())
+
+    @staticmethod
+    def simhash(normalized):
+        weights = [0.0] * 64
+        for word, count in Counter(normalized.split()).items():
+            weight = count * (1 + math.log(len(word)))
+            h = int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+            for bit in range(64):
+                weights[bit] += weight if h >> bit & 1 else -weight
+        return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+    def _band_keys(self, fingerprint):
+        keys = []
+        for width in self.band_widths:
+            keys.append(fingerprint & ((1 << width) - 1))
+            fingerprint >>= width
+        return keys
+
+    def _find(self, fingerprint):
+        if fingerprint in self.entries:
+            return fingerprint
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            for candidate in band.get(key, ()):
+                if bin(candidate ^ fingerprint).count('1') <= self.max_distance:
+                    return candidate
+        return None
+
+    def _remove(self, fingerprint):
+        del self.entries[fingerprint]
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            members = band.get(key)
+            if members:
+                members.discard(fingerprint)
+                if not members:
+                    del band[key]
+
+    def _evict(self, now):
+        while self.entries:
+            fingerprint, entry = next(iter(self.entries.items()))
+            if len(self.entries) <= self.max_entries and now - entry['created_at'] < self.ttl:
+                break
+            self._remove(fingerprint)
+
+    def get(self, text):
+        """Return a cached reply for text or a near-duplicate of it, or None when one should be generated."""
+        normalized = self.normalize(text)
+        if not normalized:
+            return None
+        now = time.time()
+        with self.lock:
+            self._evict(now)
+            fingerprint = self._find(self.simhash(normalized))
+            entry = self.entries.get(fingerprint) if fingerprint is not None else None
+            if entry is not None and now - entry['created_at'] >= self.ttl:
+                self._remove(fingerprint)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(fingerprint)
+            variant = min(entry['variants'], key=lambda v: v['served_at'])
+            if now - variant['served_at'] < self.repeat_interval and len(entry['variants']) < self.max_variants:
+                # Generate another variant (in a new random tone) rather than repeat a recent reply
+                self.variants_added += 1
+                return None
+            variant['served_at'] = now
+            self.served += 1
+            return variant['reply']
+
+    def put(self, text, reply):
+        """Store a freshly generated (and about to be posted) reply for text."""
+        normalized = self.normalize(text)
+        if not normalized:
+            return
+        now = time.time()
+        with self.lock:
+            fingerprint = self.simhash(normalized)
+            existing = self._find(fingerprint)
+            if existing is None:
+                self.entries[fingerprint] = {'created_at': now, 'variants': []}
+                for band, key in zip(self.bands, self._band_keys(fingerprint)):
+                    band.setdefault(key, set()).add(fingerprint)
+                existing = fingerprint
+            variants = self.entries[existing]['variants']
+            variants.append({'reply': reply, 'served_at': now})
+            if len(variants) > self.max_variants:
+                variants.remove(min(variants, key=lambda v: v['served_at']))
+            self.entries.move_to_end(existing)
+            self._evict(now)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'variants_added': self.variants_added,
+            'generations_saved': self.served,
+        }
+
+
+class SessionManager:
+    """Stored X session cookies: cheap validity checks before any page load, and rewrites when they rotate.
+
+    validate() only looks at the cookies themselves (auth cookies present and not about to
+    expire); TwitterBot then confirms the session with one authenticated page load.
+    save() rewrites the cookies file only when a cookie value actually changed.
+    """
+
+    AUTH_COOKIES = ('auth_token', 'ct0')
+
+    def __init__(self, path, expiry_margin=60 * 60):
+        self.path = path
+        self.expiry_margin = expiry_margin
+        self.saved = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                cookies = json.load(f)
+            return cookies if isinstance(cookies, list) else None
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            log.warning("[SessionManager] Could not read %s: %s", self.path, e)
+            return None
+
+    def validate(self, cookies):
+        """Return why cookies can't restore a session, or None if they look usable."""
+        if not cookies:
+            return "no saved cookies"
+        by_name = {cookie.get('name'): cookie for cookie in cookies}
+        for name in self.AUTH_COOKIES:
+            cookie = by_name.get(name)
+            if not cookie or not cookie.get('value'):
+                return f"{name} cookie missing"
+            # Cookies without an expiry are session cookies and stay valid until X revokes them
+            expiry = cookie.get('expiry')
+            if expiry and expiry < time.time() + self.expiry_margin:
+                return f"{name} cookie expired"
+        return None
+
+    @staticmethod
+    def values(cookies):
+        return {(cookie.get('domain'), cookie.get('name')): cookie.get('value') for cookie in cookies or []}
+
+    def save(self, cookies):
+        """Write cookies if any value differs from the saved ones. Returns True if the file was updated."""
+        if not cookies or self.values(cookies) == self.values(self.saved):
+            return False
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(cookies, f)
+        os.replace(tmp_path, self.path)
+        self.saved = cookies
+        return True
+
+    @staticmethod
+    def to_cdp(cookie):
+        """Convert a Selenium cookie dict into a DevTools Network.CookieParam."""
+        param = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly') if key in cookie}
+        if cookie.get('expiry'):
+            param['expires'] = cookie['expiry']
+        if cookie.get('sameSite') in ('Strict', 'Lax', 'None'):
+            param['sameSite'] = cookie['sameSite']
+        return param
+
+
+class Checkpoint:
+    """Where the bot is inside a query, so a restarted bot resumes there instead of starting over.
+
+    Holds the query and tab being processed, the replies already made in that tab and the
+    IDs replied to during the query. Written atomically on every change and cleared once
+    the query is done.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        try:
+            with open(path, 'r') as f:
+                self.state = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (ValueError, OSError) as e:
+            log.warning("[Checkpoint] Could not read %s: %s", path, e)
+
+    def start_tab(self, query, tab):
+        if self.state.get('query') != query:
+            self.state = {'query': query, 'replied': []}
+        if self.state.get('tab') != tab:
+            self.state.update(tab=tab, tab_replies=0)
+        self.save()
+
+    def replied(self, tweet_id):
+        self.state['replied'].append(tweet_id)
+        self.state['tab_replies'] += 1
+        self.save()
+
+    def clear(self):
+        self.state = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        self.state['updated_at'] = time.time()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.path)
+
+
+class QueryScheduler:
+    """Chooses which search query to run next from each query's observed yield.
+
+    Every visit records page loads, new eligible tweets, replies and time spent. A query
+    becomes due again after a revisit interval sized to how quickly it produces fresh
+    eligible tweets (clamped to [min_revisit, max_revisit]). Among due queries the one
+    with the best UCB score wins: recent replies per minute spent plus an exploration
+    bonus, so rarely visited queries keep being sampled. Stats persist to a JSON file.
+    """
+
+    def __init__(self, queries, path, min_revisit=5 * 60, max_revisit=2 * 60 * 60,
+                 exploration=1.0, fresh_target=2, alpha=0.3):
+        self.queries = list(queries)
+        self.path = path
+        self.min_revisit = min_revisit
+        self.max_revisit = max_revisit
+        self.exploration = exploration
+        self.fresh_target = fresh_target
+        self.alpha = alpha
+        self.stats = {}
+        try:
+            with open(path, 'r') as f:
+                self.stats = json.load(f)
+            log.info("[QueryScheduler] Loaded stats for %s queries from %s", len(self.stats), path)
+        except FileNotFoundError:
+            log.info("[QueryScheduler] No query stats file found, starting fresh.")
+        except (ValueError, OSError) as e:
+            log.warning("[QueryScheduler] Could not read %s: %s", path, e)
+        for query in self.queries:
+            self.stats.setdefault(query, {
+                'visits': 0, 'page_loads': 0, 'eligible': 0, 'replies': 0, 'seconds': 0.0,
+                'reply_rate': 0.0,   # EWMA of replies per minute spent on the query
+                'fresh_rate': None,  # EWMA of new eligible tweets per second between visits
+                'last_visit': 0.0,
+                'revisit_interval': min_revisit,
+            })
+
+    def _score(self, stats, total_visits):
+        if stats['visits'] == 0:
+            return float('inf')
+        bonus = self.exploration * math.sqrt(math.log(total_visits + 1) / stats['visits'])
+        return stats['reply_rate'] + bonus
+
+    def next_query(self):
+        """Return (query, 0) for the best due query, or (None, seconds until one is due).
+
+        The returned query is marked as visited now so it isn't handed out twice.
+        """
+        now = time.time()
+        due = [q for q in self.queries
+               if now - self.stats[q]['last_visit'] >= self.stats[q]['revisit_interval']]
+        if not due:
+            wait = min(self.stats[q]['last_visit'] + self.stats[q]['revisit_interval'] - now for q in self.queries)
+            return None, max(wait, 1)
+        total_visits = sum(self.stats[q]['visits'] for q in self.queries)
+        random.shuffle(due)  # break ties between unvisited queries randomly
+        query = max(due, key=lambda q: self._score(self.stats[q], total_visits))
+        self.stats[query]['previous_visit'] = self.stats[query]['last_visit']
+        self.stats[query]['last_visit'] = now
+        return query, 0
+
+    def record(self, query, replies, eligible, page_loads, seconds):
+        """Update a query's stats after a visit, recompute its revisit interval and persist."""
+        stats = self.stats[query]
+        stats['visits'] += 1
+        stats['page_loads'] += page_loads
+        stats['eligible'] += eligible
+        stats['replies'] += replies
+        stats['seconds'] += seconds
+
+        reply_rate = replies / max(seconds / 60, 1 / 60)
+        if stats['visits'] == 1:
+            stats['reply_rate'] = reply_rate
+        else:
+            stats['reply_rate'] += self.alpha * (reply_rate - stats['reply_rate'])
+
+        previous_visit = stats.pop('previous_visit', 0.0)
+        if previous_visit:
+            fresh_rate = eligible / max(stats['last_visit'] - previous_visit, 1)
+            if stats['fresh_rate'] is None:
+                stats['fresh_rate'] = fresh_rate
+            else:
+                stats['fresh_rate'] += self.alpha * (fresh_rate - stats['fresh_rate'])
+        if stats['fresh_rate']:
+            interval = self.fresh_target / stats['fresh_rate']
+        elif stats['fresh_rate'] == 0:
+            # Nothing new last time; back off gradually
+            interval = stats['revisit_interval'] * 2
+        else:
+            interval = self.min_revisit
+        stats['revisit_interval'] = min(max(interval, self.min_revisit), self.max_revisit)
+        self.save()
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.stats, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def summary(self):
+        """Query stats sorted by total replies, for logging."""
+        return sorted(((q, self.stats[q]) for q in self.queries), key=lambda item: -item[1]['replies'])
+
+
+def trie_pattern(words):
+    """Regex alternation for words, shaped as a prefix trie so matching cost tracks word length, not word count."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            return f'(?:{pattern})?'
+        return pattern
+
+    return build(trie)
+
+
+class TweetFilter:
+    """Block, allow and mute rules loaded from files and checked against a tweet record in one pass.
+
+    Each file has one rule per line; blank lines and lines starting with "# " are ignored.
+    Blocked and allowed handles are lowercase sets. Mute rules are keywords, matched
+    case-insensitively as whole words, or "re:"-prefixed regexes; all of them are compiled
+    into a single pattern. Tweets by allowlisted authors skip every rule and are replied to
+    first. check() returns the reason and the rule that fired, and hits counts firings per
+    rule. reload_if_changed() picks up edited files.
+    """
+
+    MENTION_RE = re.compile(r'@(\w{1,15})')
+    GLOBAL_FLAGS_RE = re.compile(r'^\(\?([aiLmsux]+)\)')
+    NUMBERED_BACKREFERENCE_RE = re.compile(r'\\[1-9]|\(\?\(\d')
+    # Group names used by the combined pattern
+    RESERVED_GROUPS = {'keyword', 'pattern'}
+
+    def __init__(self, blocklist_file=None, allowlist_file=None, mute_rules_file=None, default_blocked=()):
+        self.files = {'blocked': blocklist_file, 'allowed': allowlist_file, 'muted': mute_rules_file}
+        self.default_blocked = {handle.lower() for handle in default_blocked}
+        self.hits = Counter()
+        self.load()
+
+    @staticmethod
+    def read_rules(path):
+        """(line number, rule) pairs from a rule file."""
+        if not path:
+            return []
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = [(number, line.strip()) for number, line in enumerate(f, 1)]
+        return [(number, line) for number, line in lines if line and line != '#' and not line.startswith('# ')]
+
+    def compile_rule(self, regex, group_names):
+        """Compile a mute regex so it can be embedded in the combined pattern; raises ValueError if it can't be."""
+        flags = self.GLOBAL_FLAGS_RE.match(regex)
+        if flags:
+            scoped = flags.group(1).replace('i', '')
+            rest = regex[flags.end():]
+            regex = f"(?{scoped}:{rest})" if scoped else rest
+        try:
+            pattern = re.compile(regex, re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(str(e)) from e
+        clashes = set(pattern.groupindex) & (self.RESERVED_GROUPS | group_names)
+        if clashes:
+            raise ValueError(f"group name {', '.join(sorted(clashes))} is reserved or used by another rule")
+        if self.NUMBERED_BACKREFERENCE_RE.search(regex):
+            raise ValueError("numbered backreferences break when rules are combined; use a named group and (?P=name)")
+        if pattern.match(''):
+            raise ValueError("matches empty text, so it would mute every tweet")
+        group_names.update(pattern.groupindex)
+        return pattern
+
+    def mtimes(self):
+        return {name: os.stat(path).st_mtime for name, path in self.files.items() if path}
+
+    def load(self):
+        mtimes = self.mtimes()
+        blocked = self.default_blocked | {h.lstrip('@').lower() for _, h in self.read_rules(self.files['blocked'])}
+        allowed = {h.lstrip('@').lower() for _, h in self.read_rules(self.files['allowed'])}
+        keywords, patterns, group_names = [], [], set()
+        for number, rule in self.read_rules(self.files['muted']):
+            if not rule.startswith('re:'):
+                keywords.append(rule.lower())
+                continue
+            try:
+                patterns.append((rule[3:], self.compile_rule(rule[3:], group_names)))
+            except ValueError as e:
+                log.error("[TweetFilter] %s:%s: skipping mute rule %r: %s", self.files['muted'], number, rule, e)
+        parts = []
+        if keywords:
+            parts.append(rf"(?<!\w)(?P<keyword>{trie_pattern(keywords)})(?!\w)")
+        if patterns:
+            parts.append("(?P<pattern>" + "|".join(f"(?:{p.pattern})" for _, p in patterns) + ")")
+
+        self.matcher = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+        self.blocked, self.allowed, self.patterns, self.loaded_mtimes = blocked, allowed, patterns, mtimes
+        log.info("[TweetFilter] %s blocked handles, %s allowed handles, %s keywords, %s regex rules",
+                 len(blocked), len(allowed), len(keywords), len(patterns))
+
+    def reload_if_changed(self):
+        """Reload the rule files if any was modified; on errors the current rules stay in place."""
+        try:
+            if self.mtimes() == self.loaded_mtimes:
+                return False
+            self.load()
+            return True
+        except (OSError, re.error) as e:
+            log.error("[TweetFilter] Could not reload rules, keeping the current ones: %s", e)
+            return False
+
+    def is_priority(self, tweet):
+        return tweet.get('author') in self.allowed
+
+    def check(self, tweet):
+        """Return (reason, rule) for the first block or mute rule the tweet hits, or None."""
+        if tweet.get('author') in self.allowed:
+            return None
+        for handle in tweet.get('handles') or ():
+            if handle in self.blocked:
+                return self.fire('blocked', f"handle @{handle}")
+        text = tweet.get('text') or ''
+        for mention in self.MENTION_RE.findall(text):
+            if mention.lower() in self.blocked:
+                return self.fire('blocked', f"mention @{mention.lower()}")
+        match = self.matcher.search(text) if self.matcher else None
+        if match is None:
+            return None
+        if match.groupdict().get('keyword') is not None:
+            return self.fire('muted', f"keyword {match.group('keyword').lower()}")
+        # Only on a hit: find which regex of the combined pattern matched here
+        rule = next((rule for rule, p in self.patterns if p.match(text, match.start())), match.group(0))
+        return self.fire('muted', f"regex {rule}")
+
+    def fire(self, reason, rule):
+        self.hits[rule] += 1
+        return reason, rule
+
+
+class RelevanceRanker:
+    """Cheap local scoring of eligible tweets, so only promising ones reach the LLM.
+
+    Each page of candidates is turned into hashed TF-IDF vectors (unigrams and bigrams,
+    with document frequencies learned from every tweet seen so far) and scored with NumPy:
+    relevance is the share of a tweet's weight on topic or query terms. Short or stale
+    tweets get part of their relevance taken off, and spam markers are subtracted.
+    select() keeps the top_k candidates scoring at least threshold and logs every decision.
+    """
+
+    TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+    URL_RE = re.compile(r'https?://\S+|www\.\S+')
+
+    def __init__(self, threshold=0.3, top_k=10, weights=None, topics=(), spam_terms=(), dimensions=2 ** 14):
+        self.threshold = threshold
+        self.top_k = top_k
+        self.weights = dict(DEFAULT_RANKER_WEIGHTS, **(weights or {}))
+        self.dimensions = dimensions
+        self.spam_terms = {' '.join(self.tokenize(term)) for term in spam_terms}
+        self.document_frequency = None  # created on first use, so numpy loads lazily
+        self.documents = 0
+        self.bucket_cache = {}
+        self.topic_columns = self.columns(topics)
+
+    @classmethod
+    def tokenize(cls, text):
+        """Lowercase words with URLs and '#' dropped, "next.js" as "next" and a trailing plural "s" removed."""
+        tokens = []
+        for token in cls.TOKEN_RE.findall(cls.URL_RE.sub(' ', text.lower()).replace('#', ' ')):
+            token = token.split('.')[0]
+            if len(token) > 4 and token.endswith('s') and not token.endswith('ss'):
+                token = token[:-1]
+            tokens.append(token)
+        return tokens
+
+    @staticmethod
+    def terms(tokens):
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def bucket(self, term):
+        column = self.bucket_cache.get(term)
+        if column is None:
+            column = int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little') % self.dimensions
+            if len(self.bucket_cache) < 100000:
+                self.bucket_cache[term] = column
+        return column
+
+    def columns(self, phrases):
+        """Hashed columns of the terms in phrases; a phrase of several words stands for its bigrams."""
+        columns = set()
+        for phrase in phrases:
+            tokens = self.tokenize(phrase)
+            terms = tokens if len(tokens) == 1 else self.terms(tokens)[len(tokens):]
+            columns.update(self.bucket(term) for term in terms)
+        return columns
+
+    def tfidf(self, token_lists):
+        """Rows of L2-normalised TF-IDF vectors; document frequencies are updated with these rows first."""
+        rows, columns = [], []
+        for row, tokens in enumerate(token_lists):
+            for term in self.terms(tokens):
+                rows.append(row)
+                columns.append(self.bucket(term))
+        np = import_numpy()
+        if self.document_frequency is None:
+            self.document_frequency = np.zeros(self.dimensions, dtype=np.float32)
+        counts = np.zeros((len(token_lists), self.dimensions), dtype=np.float32)
+        np.add.at(counts, (rows, columns), 1)
+        self.document_frequency += (counts > 0).sum(axis=0)
+        self.documents += len(token_lists)
+        idf = np.log((1 + self.documents) / (1 + self.document_frequency)) + 1
+        matrix = counts * idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def spam_score(self, text, tokens):
+        joined = f" {' '.join(tokens)} "
+        hits = sum(f" {term} " in joined for term in self.spam_terms)
+        letters = [c for c in text if c.isalpha()]
+        shouting = len(letters) >= 20 and sum(c.isupper() for c in letters) / len(letters) > 0.6
+        hashtags = text.count('#') >= 4
+        links = len(self.URL_RE.findall(text)) >= 2
+        return min(1.0, 0.5 * hits + 0.3 * shouting + 0.3 * hashtags + 0.2 * links)
+
+    @staticmethod
+    def freshness(tweet, now):
+        """1 for a tweet posted now, halving every 12 hours; 0.5 when the timestamp is unknown."""
+        created_at = tweet.get('created_at')
+        if not created_at:
+            return 0.5
+        try:
+            posted = datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
+        except ValueError:
+            return 0.5
+        return 0.5 ** (max(0.0, now - posted) / (12 * 60 * 60))
+
+    def score(self, tweets, query=''):
+        """Score tweet records; returns an array of scores and one dict of features per tweet."""
+        np = import_numpy()
+        texts = [tweet.get('text') or '' for tweet in tweets]
+        token_lists = [self.tokenize(text) for text in texts]
+        profile = np.zeros(self.dimensions, dtype=np.float32)
+        profile[list(self.topic_columns | self.columns([query]))] = 1
+        # Two on-topic terms in an average tweet already put about 0.35 of its weight on them
+        relevance = np.clip(self.tfidf(token_lists) @ profile / 0.35, 0, 1)
+        length = np.clip((np.array([len(text) for text in texts], dtype=np.float32) - 20) / 60, 0, 1)
+        now = time.time()
+        freshness = np.array([self.freshness(tweet, now) for tweet in tweets], dtype=np.float32)
+        spam = np.array([self.spam_score(text, tokens) for text, tokens in zip(texts, token_lists)], dtype=np.float32)
+        w = self.weights
+        scores = relevance * (1 - w['length'] * (1 - length) - w['freshness'] * (1 - freshness)) - w['spam'] * spam
+        features = [{'relevance': float(r), 'length': float(l), 'freshness': float(f), 'spam': float(p)}
+                    for r, l, f, p in zip(relevance, length, freshness, spam)]
+        return scores, features
+
+    def select(self, tweets, query='', priority=None, limit=None):
+        """Rank tweet records and split them into (kept, dropped).
+
+        kept is best first, at most top_k (or limit, if lower), all scoring at least threshold;
+        tweets for which priority(tweet) is true are kept and put first whatever they score.
+        dropped holds (tweet, reason) pairs with reason "low_score" or "ranked_out".
+        """
+        if not tweets:
+            return [], []
+        top_k = self.top_k if limit is None else min(self.top_k, limit)
+        scores, features = self.score(tweets, query)
+        prioritized = [bool(priority and priority(tweet)) for tweet in tweets]
+        order = sorted(range(len(tweets)), key=lambda i: (not prioritized[i], -scores[i]))
+        kept, dropped = [], []
+        for i in order:
+            tweet = tweets[i]
+            if prioritized[i]:
+                decision = 'priority'
+            elif scores[i] < self.threshold:
+                decision = 'low_score'
+            elif len(kept) >= top_k:
+                decision = 'ranked_out'
+            else:
+                decision = 'kept'
+            if decision in ('kept', 'priority'):
+                kept.append(tweet)
+            else:
+                dropped.append((tweet, decision))
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("[RelevanceRanker] %s %.3f %s: %s", tweet.get('id'), scores[i], decision,
+                          ", ".join(f"{name} {value:.2f}" for name, value in features[i].items()),
+                          extra={'tweet_id': tweet.get('id'), 'query': query, 'score': round(float(scores[i]), 3),
+                                 'decision': decision, **{name: round(value, 3) for name, value in features[i].items()}})
+        log.info("[RelevanceRanker] Kept %s/%s for '%s' (scores %.2f to %.2f, threshold %.2f, top %s)",
+                 len(kept), len(tweets), query, float(scores.min()), float(scores.max()), self.threshold, top_k)
+        return kept, dropped
 
-missing_vars = [k for k, v in env_vars.items() if not v]
-if missing_vars:
-    print(f"\n⚠️ Missing required environment variables: {', '.join(missing_vars)}")
-    print("Please check your .env file")
-    sys.exit(1)
 
 class TwitterBot:
-    def __init__(self):
-        print("\n=== Initializing TwitterBot ===")
+    def __init__(self, username=None, password=None, cookies_file=None, chrome_profile=None, processed_tweets=None,
+                 metrics_file=None, debugger_address=None):
+        """Credentials, cookies file and profile default to the .env account; pass them to run another account.
+
+        processed_tweets may be any dedupe store with the ProcessedTweetStore interface, e.g. the
+        supervisor's shared store in multi-account mode. metrics_file defaults to METRICS_FILE.
+        debugger_address ("host:port") attaches to an already running Chrome instead of
+        launching one; it defaults to CHROME_DEBUGGER_ADDRESS, and "" always launches.
+        """
+        log.info("=== Initializing TwitterBot ===")
         try:
-            self.username = os.getenv('TWITTER_USERNAME')
-            self.password = os.getenv('TWITTER_PASSWORD')
-            self.cookies_file = os.getenv('COOKIES_FILE')
+            self.username = username or os.getenv('TWITTER_USERNAME')
+            self.password = password or os.getenv('TWITTER_PASSWORD')
+            self.cookies_file = cookies_file or os.getenv('COOKIES_FILE')
+            # Persistent dedupe store so restarts don't re-engage tweets we've already handled
+            if processed_tweets is None:
+                processed_db = os.getenv('PROCESSED_DB_FILE') or os.path.join(
+                    os.path.dirname(os.path.abspath(__file__)), 'processed_tweets.db')
+                use_bloom = os.getenv('PROCESSED_DB_BLOOM', '').lower() in ('1', 'true', 'yes')
+                processed_tweets = ProcessedTweetStore(processed_db, use_bloom=use_bloom)
+            self.processed_tweets = processed_tweets
             # Set Chrome profile path to a custom directory
-            self.chrome_profile = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chrome_profile')
-            print(f"Chrome profile directory: {self.chrome_profile}")
-            
-            # Initialize Gemini AI
-            print("\nInitializing Gemini AI...")
+            self.chrome_profile = chrome_profile or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chrome_profile')
+            log.info("Chrome profile directory: %s", self.chrome_profile)
+            self.debugger_address = os.getenv('CHROME_DEBUGGER_ADDRESS') if debugger_address is None else debugger_address
+            self.browser_mode = os.getenv('BROWSER_MODE', 'full').lower()
+            if self.browser_mode not in BROWSER_MODES:
+                raise ValueError(f"BROWSER_MODE must be one of {', '.join(BROWSER_MODES)}, not {self.browser_mode!r}")
+
+            ranker_settings = dict(DEFAULT_RANKER_SETTINGS, **(json.loads(os.getenv('RANKER') or 'null') or {}))
+            self.ranker = RelevanceRanker(topics=RANKER_TOPICS, spam_terms=RANKER_SPAM_TERMS, **ranker_settings)
+
+            # Block/allow/mute rules; edits to the files are picked up before each query
+            self.tweet_filter = TweetFilter(os.getenv('BLOCKLIST_FILE'), os.getenv('ALLOWLIST_FILE'),
+                                            os.getenv('MUTE_RULES_FILE'), default_blocked=DEFAULT_BLOCKED_HANDLES)
+
             gemini_api_key = os.getenv('GEMINI_API_KEY')
             if not gemini_api_key:
                 raise ValueError("GEMINI_API_KEY not found in environment variables")
-            self.client = genai.Client(api_key=gemini_api_key)
-            self.models = self.client.models
-            print("✓ Gemini AI client initialized successfully!")
         except Exception as e:
-            print(f"\n❌ Error during initialization: {str(e)}")
-            print(traceback.format_exc())
+            log.exception("❌ Error during initialization: %s", e)
             sys.exit(1)
         
-        self.tech_search_queries = [
-            "Next.js", "Node.js", "Express.js", "Golang", "CI/CD", "Docker",
-            "#fullstackdev", "#webdev", "#softwareengineering",
-            "cloud computing", "#AWS", "#GCP", "#Azure", "#DevOps",
-            "serverless", "microservices", "kubernetes", "reactjs"
-        ]
-        print(f"\nSearch queries configured: {len(self.tech_search_queries)} queries")
-        
+        # Per-stage timings and outcome counters; exported after every query when a path is set
+        self.metrics = Metrics(path=metrics_file or os.getenv('METRICS_FILE'))
+
+        self.tech_search_queries = list(TECH_SEARCH_QUERIES)
+        self.search_operators = os.getenv('SEARCH_OPERATORS', DEFAULT_SEARCH_OPERATORS)
+        log.info("Search queries configured: %s queries", len(self.tech_search_queries))
+
+        # Human-like pacing; page readiness is handled by the wait_for_* helpers instead
+        self.pacing = PacingPolicy(scale=float(os.getenv('PACING_SCALE', '1')))
+        # Searches, likes and replies run as fast as this budget allows, and never faster
+        rate_limits = json.loads(os.getenv('RATE_LIMITS') or 'null') or DEFAULT_RATE_LIMITS
+        self.rate_limiter = RateLimiter(rate_limits, state_path=f"{os.path.splitext(self.cookies_file)[0]}_rate_limits.json")
+        self.session = SessionManager(self.cookies_file)
+        self.logged_in = False
+        self.checkpoint = Checkpoint(f"{os.path.splitext(self.cookies_file)[0]}_checkpoint.json")
+        watchdog_limits = json.loads(os.getenv('WATCHDOG_LIMITS') or 'null') or {}
+        self.watchdog_limits = dict(DEFAULT_WATCHDOG_LIMITS, **watchdog_limits)
+
+        # Replies are generated in a small thread pool so the browser never waits on the LLM
+        self.ai_workers = 3
+        # Tweets per Gemini request; 1 disables batching
+        self.ai_batch_size = 5
+        # Replies are inserted in one DevTools call, so any Unicode text can be posted;
+        # REPLY_ASCII_ONLY=1 still restricts replies to plain ASCII
+        self.ascii_only = os.getenv('REPLY_ASCII_ONLY', '').lower() in ('1', 'true', 'yes')
+        # Near-duplicate tweets (copy-pasted promos, threads) reuse earlier replies; None disables
+        self.reply_cache = ReplyCache()
+        self.ai_executor = ThreadPoolExecutor(max_workers=self.ai_workers, thread_name_prefix='ai-reply')
+        self.time_to_first_search = None
+
+        # Import google.genai and create the client in the background while Chrome starts
+        log.info("Initializing Gemini AI...")
+        genai_client = self.ai_executor.submit(create_genai_client, gemini_api_key)
+        # numpy too, so the first ranked page doesn't wait for it
+        self.ai_executor.submit(import_numpy)
+
         # Initialize the driver when creating the bot
-        print("\n=== Setting up Chrome Driver ===")
+        log.info("=== Setting up Chrome Driver ===")
         self.setup_driver()
 
+        try:
+            self.client = genai_client.result()
+            self.models = self.client.models
+            log.info("✓ Gemini AI client initialized successfully!")
+        except Exception as e:
+            log.exception("❌ Error initializing Gemini AI: %s", e)
+            self.cleanup()
+            sys.exit(1)
+
     def setup_driver(self):
-        print("[setup_driver] Called.")
+        log.debug("[setup_driver] Called.")
+        import_selenium()
+        started = time.perf_counter()
         try:
-            # Create profile directory if it doesn't exist
-            os.makedirs(self.chrome_profile, exist_ok=True)
-            
-            # Set up Chrome options
             chrome_options = webdriver.ChromeOptions()
-            chrome_options.add_argument('--start-maximized')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument(f'--user-data-dir={self.chrome_profile}')
-            chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            
-            # Initialize the Chrome WebDriver
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.wait = WebDriverWait(self.driver, 20)
-            
-            # Navigate to Twitter
-            print("Opening Twitter...")
-            self.driver.get("https://twitter.com")
-            print("Twitter opened successfully!")
-                
-            print("[setup_driver] Success.")
+            if self.debugger_address:
+                # Attach to a Chrome started with --remote-debugging-port; its own profile and flags apply
+                log.info("Attaching to Chrome at %s", self.debugger_address)
+                chrome_options.debugger_address = self.debugger_address
+            else:
+                # Create profile directory if it doesn't exist
+                os.makedirs(self.chrome_profile, exist_ok=True)
+                if self.browser_mode == 'lean':
+                    chrome_options.add_argument('--headless=new')
+                    chrome_options.add_argument(f'--window-size={LEAN_WINDOW_SIZE}')
+                    chrome_options.add_argument('--autoplay-policy=user-gesture-required')
+                    chrome_options.add_argument('--mute-audio')
+                else:
+                    chrome_options.add_argument('--start-maximized')
+                chrome_options.add_argument('--disable-gpu')
+                chrome_options.add_argument('--no-sandbox')
+                chrome_options.add_argument('--disable-dev-shm-usage')
+                chrome_options.add_argument(f'--user-data-dir={self.chrome_profile}')
+                chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
+                chrome_options.add_experimental_option('useAutomationExtension', False)
+
+            # Initialize the Chrome WebDriver. A known chromedriver path skips Selenium Manager's
+            # lookup (which may go to the network); a stale cached path falls back to it once.
+            pinned_path = os.getenv('CHROMEDRIVER_PATH')
+            driver_path = pinned_path or self.load_cached_driver_path()
+            try:
+                self.driver = webdriver.Chrome(options=chrome_options, service=Service(executable_path=driver_path))
+            except Exception as e:
+                if not driver_path or pinned_path:
+                    raise
+                log.warning("[setup_driver] Cached chromedriver %s failed (%s), resolving it again.", driver_path, e)
+                self.driver = webdriver.Chrome(options=chrome_options, service=Service())
+            self.save_cached_driver_path(self.driver.service.path)
+            self.wait = WebDriverWait(self.driver, 20, poll_frequency=0.1)
+            self.driver.set_script_timeout(30)
+            self.driver_started = time.time()
+            try:
+                # Lets the watchdog read renderer memory with Performance.getMetrics
+                self.driver.execute_cdp_cmd('Performance.enable', {})
+            except Exception as e:
+                log.debug("[setup_driver] Performance metrics unavailable: %s", e)
+            if self.browser_mode == 'lean':
+                self.apply_lean_mode()
+            # No need to open a page here; login() navigates first thing
+            log.info("Chrome ready in %.1fs", time.perf_counter() - started)
+            log.debug("[setup_driver] Success.")
+        except Exception as e:
+            log.error("[setup_driver] Error: %s", e)
+            if hasattr(self, 'driver'):
+                self.driver.quit()
+            raise e
+
+    def apply_lean_mode(self):
+        """Block images, video and fonts through DevTools, and hide headless Chrome's user agent."""
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+            user_agent = self.driver.execute_cdp_cmd('Browser.getVersion', {}).get('userAgent', '')
+            if 'HeadlessChrome' in user_agent:
+                self.driver.execute_cdp_cmd('Network.setUserAgentOverride',
+                                            {'userAgent': user_agent.replace('HeadlessChrome', 'Chrome')})
+            log.info("Lean browser mode: blocking %s URL patterns", len(LEAN_BLOCKED_URLS))
+        except Exception as e:
+            log.warning("[apply_lean_mode] Could not set up resource blocking: %s", e)
+
+    def record_page_stats(self):
+        """Record the current page's load timing and renderer memory, labelled with the browser mode."""
+        try:
+            stats = self.driver.execute_script(PAGE_STATS_JS) or {}
+        except Exception as e:
+            log.debug("[record_page_stats] Could not read page stats: %s", e)
+            return
+        if stats.get('dom_ready'):
+            self.metrics.observe(f'page_dom_ready_{self.browser_mode}', stats['dom_ready'])
+        if stats.get('load'):
+            self.metrics.observe(f'page_load_{self.browser_mode}', stats['load'])
+        gauges = {'js_heap_bytes': 'renderer_js_heap_bytes', 'dom_nodes': 'renderer_dom_nodes',
+                  'transferred_bytes': 'page_transferred_bytes'}
+        for key, name in gauges.items():
+            if stats.get(key) is not None:
+                self.metrics.set(name, stats[key], mode=self.browser_mode)
+        log.debug("[record_page_stats] %s mode: DOM ready %s s, load %s s, JS heap %s bytes, %s DOM nodes, %s bytes transferred",
+                  self.browser_mode, stats.get('dom_ready'), stats.get('load'), stats.get('js_heap_bytes'),
+                  stats.get('dom_nodes'), stats.get('transferred_bytes'))
+
+    def load_cached_driver_path(self):
+        """The chromedriver path that worked last time, if it still exists."""
+        try:
+            with open(driver_cache_path(), 'r') as f:
+                path = json.load(f).get('chromedriver')
+        except (OSError, ValueError):
+            return None
+        return path if path and os.path.exists(path) else None
+
+    def save_cached_driver_path(self, path):
+        if not path or path == self.load_cached_driver_path():
+            return
+        try:
+            with open(driver_cache_path(), 'w') as f:
+                json.dump({'chromedriver': path}, f)
+        except OSError as e:
+            log.warning("[setup_driver] Could not cache chromedriver path: %s", e)
+
+    def wait_for(self, condition, timeout=20):
+        """Wait until condition(driver) is truthy, polling quickly. Returns its value or raises TimeoutException."""
+        return WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(condition)
+
+    def wait_for_selector(self, selector, timeout=20):
+        """Block until an element matching the CSS selector exists. Returns False on timeout."""
+        try:
+            return bool(self.driver.execute_async_script(WAIT_FOR_SELECTOR_JS, selector, int(timeout * 1000)))
         except Exception as e:
-            print(f"[setup_driver] Error: {str(e)}")
-            if hasattr(self, 'driver'):
-                self.driver.quit()
-            raise e
+            log.warning("[wait_for_selector] Observer failed (%s), polling instead.", e)
+            try:
+                self.wait_for(EC.presence_of_element_located((By.CSS_SELECTOR, selector)), timeout)
+                return True
+            except TimeoutException:
+                return False
 
+    def wait_for_page_ready(self, timeout=20):
+        self.wait_for(lambda d: d.execute_script("return document.readyState") == "complete", timeout)
+
+    def wait_for_search_results(self, timeout=20):
+        """Wait until the timeline has rendered tweets or an empty state. Returns True if tweets are present."""
+        self.wait_for_selector('article[data-testid="tweet"], [data-testid="emptyState"]', timeout)
+        return bool(self.driver.find_elements(By.CSS_SELECTOR, 'article[data-testid="tweet"]'))
 
     def save_cookies(self):
-        print("[save_cookies] Called.")
-        with open(self.cookies_file, 'w') as f:
-            json.dump(self.driver.get_cookies(), f)
-        print("[save_cookies] Cookies saved.")
+        """Refresh the cookies file if X rotated any cookie since it was last written."""
+        try:
+            if self.session.save(self.driver.get_cookies()):
+                log.debug("[save_cookies] Cookies changed, file updated.")
+        except Exception as e:
+            log.warning("[save_cookies] Could not save cookies: %s", e)
 
-    def load_cookies(self):
-        print("[load_cookies] Called.")
+    def load_cookies(self, cookies):
+        """Put saved cookies into the browser without loading a page first (falls back to a tiny x.com page)."""
+        log.debug("[load_cookies] Injecting %s cookies.", len(cookies))
         try:
-            with open(self.cookies_file, 'r') as f:
-                cookies = json.load(f)
-                for cookie in cookies:
-                    self.driver.add_cookie(cookie)
-            print("[load_cookies] Cookies loaded.")
-            return True
-        except FileNotFoundError:
-            print("[load_cookies] No cookies file found.")
+            self.driver.execute_cdp_cmd('Network.setCookies', {'cookies': [SessionManager.to_cdp(c) for c in cookies]})
+        except Exception as e:
+            log.debug("[load_cookies] Network.setCookies failed (%s), adding cookies on x.com.", e)
+            # add_cookie only works on a page of the cookie's domain
+            self.driver.get('https://x.com/robots.txt')
+            for cookie in cookies:
+                self.driver.add_cookie(cookie)
+
+    def check_logged_in(self, navigate=True):
+        """Open the home timeline and report whether X shows the signed-in app or a login prompt."""
+        if navigate:
+            self.driver.get('https://x.com/home')
+        self.wait_for_selector(f"{LOGGED_IN_SELECTOR}, {LOGGED_OUT_SELECTOR}")
+        url = self.driver.current_url.lower()
+        if 'login' in url or 'logout' in url:
             return False
+        return bool(self.driver.find_elements(By.CSS_SELECTOR, LOGGED_IN_SELECTOR))
 
     def login(self):
-        print("[login] Called.")
+        """Restore the saved session if it's still valid, otherwise log in with credentials. Returns the login state."""
+        log.debug("[login] Called.")
+        started = time.perf_counter()
         try:
-            print("Starting login process...")
-            print("Navigating to login flow...")
-            self.driver.get('https://x.com/i/flow/login')
-            time.sleep(5)  # Wait for page to fully load
-            
-            print("Checking for existing cookies...")
-            if not self.load_cookies():
-                print("No existing cookies found. Proceeding with manual login...")
-                
-                # Wait and enter username
-                print("Looking for username field...")
-                username_input = self.wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 'input[autocomplete="username"]'))
-                )
-                print("Found username field, entering username...")
-                username_input.clear()
-                for char in self.username:
-                    username_input.send_keys(char)
-                    time.sleep(0.1)
-                time.sleep(1)
-                username_input.send_keys(Keys.RETURN)
-                time.sleep(2)
-                
-                # Wait and enter password
-                print("Looking for password field...")
-                password_input = self.wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 'input[name="password"]'))
-                )
-                print("Found password field, entering password...")
-                password_input.clear()
-                for char in self.password:
-                    password_input.send_keys(char)
-                    time.sleep(0.1)
-                time.sleep(1)
-                password_input.send_keys(Keys.RETURN)
-                
-                # Wait for login to complete
-                print("Waiting for login to complete...")
-                time.sleep(10)
-                self.save_cookies()
-            
-            # Navigate to home feed
-            print("Navigating to home feed...")
-            self.driver.get('https://x.com/home')
-            time.sleep(5)
-            
-            # Verify login success
-            if "home" in self.driver.current_url.lower() or "communities/1493446837214187523" or "communities/1471580197908586507" in self.driver.current_url:
-                print("Successfully logged in and navigated to the community!")
-                # Navigate to the specified community after login
-                # print("Navigating to the community page...")
-                # self.driver.get('https://x.com/i/communities/1471580197908586507')
-                time.sleep(5)
-                return True
-            else:
-                print("Login verification failed. Current URL:", self.driver.current_url)
+            cookies = self.session.saved
+            reason = self.session.validate(cookies)
+            if reason is None:
+                self.load_cookies(cookies)
+                if self.check_logged_in():
+                    self.set_logged_in(True, 'cookies', started)
+                    self.save_cookies()
+                    return True
+                reason = "X rejected the saved session"
+                self.driver.delete_all_cookies()
+
+            log.info("Saved session not usable (%s). Logging in with credentials...", reason)
+            self.login_with_credentials()
+            if not self.check_logged_in(navigate='/home' not in self.driver.current_url):
+                log.error("Login verification failed. Current URL: %s", self.driver.current_url)
+                self.set_logged_in(False, 'failed', started)
                 return False
-            
+            self.set_logged_in(True, 'credentials', started)
+            self.save_cookies()
+            return True
+
         except Exception as e:
-            print(f"Login failed with error: {str(e)}")
-            print("Current URL:", self.driver.current_url)
+            log.error("Login failed with error: %s (current URL: %s)", e, self.driver.current_url)
+            self.set_logged_in(False, 'failed', started)
             return False
 
+    def set_logged_in(self, logged_in, method, started):
+        self.logged_in = logged_in
+        self.metrics.set('logged_in', int(logged_in))
+        self.metrics.inc('logins', method=method)
+        if logged_in:
+            log.info("Logged in as %s via %s in %.1fs", self.username, method, time.perf_counter() - started)
+
+    def login_with_credentials(self):
+        """Type the username and password into X's login flow and wait for the redirect home."""
+        log.debug("Navigating to login flow...")
+        self.driver.get('https://x.com/i/flow/login')
+
+        # Wait and enter username
+        log.debug("Looking for username field...")
+        username_input = self.wait.until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, 'input[autocomplete="username"]'))
+        )
+        log.debug("Found username field, entering username...")
+        username_input.clear()
+        for char in self.username:
+            username_input.send_keys(char)
+            self.pacing.pause('keystroke')
+        self.pacing.pause('before_click')
+        username_input.send_keys(Keys.RETURN)
+
+        # Wait and enter password
+        log.debug("Looking for password field...")
+        password_input = self.wait.until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, 'input[name="password"]'))
+        )
+        log.debug("Found password field, entering password...")
+        password_input.clear()
+        for char in self.password:
+            password_input.send_keys(char)
+            self.pacing.pause('keystroke')
+        self.pacing.pause('before_click')
+        password_input.send_keys(Keys.RETURN)
+
+        # Wait for login to complete (X redirects to /home once authenticated)
+        log.info("Waiting for login to complete...")
+        try:
+            self.wait_for(EC.url_contains('/home'), timeout=30)
+        except TimeoutException:
+            log.warning("Login did not redirect to home within 30 seconds.")
+
+    def build_search_url(self, query, tab="top"):
+        """Search URL for a query on the Top or Latest tab, with the configured search operators appended."""
+        full_query = f"{query} {self.search_operators}".strip()
+        params = urlencode({'q': full_query, 'src': 'typed_query', 'f': SEARCH_TABS[tab]}, quote_via=quote)
+        return f"https://x.com/search?{params}"
+
     def search_tweets(self, query, tab="top"):
-        print(f"[search_tweets] Called with query: {query}, tab: {tab}")
+        log.debug("[search_tweets] Called with query: %s, tab: %s", query, tab)
         try:
-            if tab == "top":
-                print(f"Searching for tweets with query: {query}")
-                
-                # Navigate to explore page first
-                self.driver.get("https://x.com/explore")
-                time.sleep(3)
-                
-                # Find and click on the search box
-                search_box = self.wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 'input[aria-label="Search query"]'))
-                )
-                search_box.clear()
-                search_box.send_keys(query)
-                search_box.send_keys(Keys.RETURN)
-                
-                # Wait for search results to load (Top tab is default)
-                time.sleep(5)
-                print(f"[search_tweets] Searching in Top tab for query: {query}")
-            
-            elif tab == "latest":
-                # Click on "Latest" tab to get most recent tweets
-                try:
-                    latest_tab = self.driver.find_element(By.XPATH, "//span[text()='Latest']")
-                    latest_tab.click()
-                    print(f"[search_tweets] Clicked on Latest tab for query: {query}")
-                    time.sleep(5)
-                except:
-                    print(f"[search_tweets] Could not find Latest tab")
-                    return []
-            
-            # Now wait for tweets to load
-            tweets = self.wait.until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, 'article[data-testid="tweet"]'))
-            )
-            print(f"[search_tweets] Found {len(tweets)} tweets in {tab} tab for '{query}'")
+            # Go straight to the results page; no explore page, search box or tab clicks
+            search_url = self.build_search_url(query, tab)
+            self.rate_limiter.acquire('search')
+            log.debug("[search_tweets] Opening %s", search_url)
+            with self.metrics.span('search_load'):
+                self.driver.get(search_url)
+                # Now wait for tweets to render, then snapshot them all in one round trip
+                rendered = self.wait_for_search_results()
+            self.record_page_stats()
+            if self.time_to_first_search is None:
+                self.time_to_first_search = time.perf_counter() - STARTUP_STARTED
+                self.metrics.observe('time_to_first_search', self.time_to_first_search)
+                log.info("Time to first search: %.1fs", self.time_to_first_search)
+            if not rendered:
+                log.info("[search_tweets] No tweets rendered in %s tab for '%s'", tab, query)
+                return []
+            tweets = self.extract_tweets()
+            log.info("[search_tweets] Found %s tweets in %s tab for '%s'", len(tweets), tab, query)
             return tweets
         except Exception as e:
-            print(f"Error searching tweets for query '{query}' in {tab} tab: {str(e)}")
+            log.error("Error searching tweets for query '%s' in %s tab: %s", query, tab, e)
+            self.metrics.inc('failures', stage='search')
             return []
 
-    def get_tweet_id(self, tweet_element):
-        print("[get_tweet_id] Called.")
-        try:
-            # Find all anchor tags in the tweet element
-            anchors = tweet_element.find_elements(By.TAG_NAME, 'a')
-            for anchor in anchors:
-                href = anchor.get_attribute('href')
-                if href and '/status/' in href:
-                    # The tweet ID is the part after the last '/'
-                    tweet_id = href.split('/status/')[-1].split('?')[0]
-                    print(f"[get_tweet_id] Found tweet_id: {tweet_id}")
-                    return tweet_id
-            return None
-        except Exception as e:
-            print(f"Error extracting tweet ID: {str(e)}")
-            return None
+    def extract_tweets(self):
+        """Snapshot every rendered tweet with a single execute_script call.
 
-    def is_blocked_handle(self, tweet_element):
-        print("[is_blocked_handle] Called.")
-        blocked_handles = [
-            'elonmusk',
-            'skysingh04'
-        ]
+        Returns a list of dicts (id, author, handles, text, liked, is_reply, plus the
+        article element and its like/reply buttons) so filtering runs in pure Python.
+        """
+        log.debug("[extract_tweets] Called.")
         try:
-            # Find all anchor tags in the tweet element (recursively)
-            anchors = tweet_element.find_elements(By.XPATH, ".//a")
-            found_handles = []
-            for anchor in anchors:
-                href = anchor.get_attribute('href')
-                if href:
-                    # Check for Twitter/X handle patterns
-                    if href.startswith('https://x.com/') or href.startswith('https://twitter.com/'):
-                        # Extract handle from full URL
-                        parts = href.split('/')
-                        if len(parts) >= 4 and parts[3] and '/status/' not in href:
-                            handle = parts[3].lower()
-                            found_handles.append(handle)
-                            print(f"[is_blocked_handle] Checking handle: {handle}")
-                            if handle in blocked_handles:
-                                print(f"[is_blocked_handle] Blocked handle found: {handle}")
-                                return True
-                    elif href.startswith('/') and '/status/' not in href and '/search' not in href:
-                        handle = href.strip('/').lower()
-                        found_handles.append(handle)
-                        print(f"[is_blocked_handle] Checking handle: {handle}")
-                        if handle in blocked_handles:
-                            print(f"[is_blocked_handle] Blocked handle found: {handle}")
-                            return True
-            
-            # Fallback: check if tweet text contains @blocked_handle or handle name
-            try:
-                tweet_text_elem = tweet_element.find_element(By.CSS_SELECTOR, '[data-testid="tweetText"]')
-                tweet_text = tweet_text_elem.text.lower()
-                for handle in blocked_handles:
-                    if f"@{handle}" in tweet_text:
-                        print(f"[is_blocked_handle] Blocked handle found in tweet text: {handle}")
-                        return True
-            except Exception as e:
-                print(f"[is_blocked_handle] Could not extract tweet text for fallback: {str(e)}")
-            
-            print(f"[is_blocked_handle] All found handles in tweet: {found_handles}")
-            return False
-        except Exception as e:
-            print(f"Error checking blocked handle: {str(e)}")
-            return False
-
-    def is_own_tweet(self, tweet_element):
-        print("[is_own_tweet] Called.")
-        try:
-            # Find all anchor tags in the tweet element
-            anchors = tweet_element.find_elements(By.TAG_NAME, 'a')
-            for anchor in anchors:
-                href = anchor.get_attribute('href')
-                if href and href.startswith('/') and '/status/' not in href:
-                    # href is like '/username'
-                    handle = href.strip('/').lower()
-                    if handle == self.username.lower():
-                        print(f"[is_own_tweet] Own tweet found: {handle}")
-                        return True
-            return False
+            with self.metrics.span('extraction'):
+                tweets = self.driver.execute_script(TWEET_SNAPSHOT_JS) or []
+            log.debug("[extract_tweets] Extracted %s tweet records.", len(tweets))
+            return tweets
         except Exception as e:
-            print(f"Error checking own tweet: {str(e)}")
-            return False
+            log.error("[extract_tweets] Error: %s", e)
+            self.metrics.inc('failures', stage='extraction')
+            return []
 
-    def is_reply_tweet(self, tweet_element):
-        print("[is_reply_tweet] Called.")
+    def scroll_for_tweets(self, seen_ids, timeout=3):
+        """Scroll the timeline once and return a snapshot after unseen tweets render (or timeout seconds)."""
         try:
-            # Check for 'Replying to' text in the tweet element
-            reply_texts = tweet_element.find_elements(By.XPATH, ".//*[contains(text(), 'Replying to')]")
-            if reply_texts:
-                print(f"[is_reply_tweet] Reply tweet found: {reply_texts[0].text}")
-                return True
-            # Optionally, check for reply icon or other indicators here
-            return False
+            with self.metrics.span('scroll'):
+                return self.driver.execute_async_script(SCROLL_AND_SNAPSHOT_JS, list(seen_ids), int(timeout * 1000)) or []
         except Exception as e:
-            print(f"Error checking reply tweet: {str(e)}")
-            return False
+            log.error("[scroll_for_tweets] Error: %s", e)
+            self.metrics.inc('failures', stage='scroll')
+            return []
 
-    def generate_ai_response(self, tweet_text):
-        print(f"[generate_ai_response] Called with tweet_text: {tweet_text}")
-        try:
-            tones = [
-                "professional and insightful",
-                "light-hearted and witty",
-                "assertive and confident",
-                "knowledgeable and helpful",
-                "slightly egoistic but still professional"
-            ]
-            selected_tone = random.choice(tones)
-
-            # Mohit Nagaraj's background and skills
-            mohit_bio = (
-                "You are Mohit Nagaraj, a Computer Science and Engineering student at Dayananda Sagar College Of Engineering (graduating 2026, CGPA 9.23). "
-                "You have strong technical skills: JavaScript, TypeScript, Go, Dart, C++. "
-                "You work with React, Next.js, Node.js + Express, PostgreSQL, MongoDB, Firestore, Flutter, Git, Redis, and Cloud. "
-                "You are experienced with Tailwind, Three.js, OAuth, tRPC, Redux, Context, Firebase, Passport, Prisma, Bootstrap, RESTful API, GraphQL, gRPC, GoFiber, Gin, and Nginx. "
-                "Notable projects: Solace (GitHub deploy platform with Docker, AWS S3, Node.js, Redis), VidStreamX (Go, FFmpeg, Docker, AWS S3/SQS), WeChat (React, Vite, Express, Socket.io, MongoDB, AWS EC2/CloudFront), Exsense (Vite, Express, Apollo GraphQL, MongoDB, Passport). "
-                "Experience: Frontend Developer at Boho, SellerSetu (Nov 2024 - Feb 2025, Expo React Native, payments, Zustand, React Query), SDE Intern at Springreen (Sep 2024 - Dec 2024, Flask, Golang, CI/CD, microservices on EC2). "
-                "Achievements: 1st place Innerve 9 AIT Pune Hackathon (AI EdTech), 2nd place GoFr Hackathon (AI social outreach), Hacktoberfest 2024 open-source contributor. "
-                "You are passionate about building, learning, and sharing in the tech community. "
-            )
+    def harvest_tweets(self, query, tab="top", max_scrolls=8, time_budget=60):
+        """Yield lists of newly rendered tweet records for a search, scrolling the timeline as the consumer asks for more.
+
+        Tweets are deduped by ID across scrolls. Harvesting stops when the consumer stops
+        iterating, after max_scrolls scrolls, once loading and scrolling have taken
+        time_budget seconds (time spent by the consumer between batches isn't counted),
+        or once two scrolls in a row render nothing new.
+        """
+        started = time.time()
+        tweets = self.search_tweets(query, tab=tab)
+        harvest_seconds = time.time() - started
+        seen = set()
+        scrolls = 0
+        idle_scrolls = 0
+        while True:
+            new_tweets = []
+            for tweet in tweets:
+                tweet_id = self.get_tweet_id(tweet)
+                if tweet_id and tweet_id not in seen:
+                    seen.add(tweet_id)
+                    new_tweets.append(tweet)
+            if new_tweets:
+                idle_scrolls = 0
+                yield new_tweets
+            else:
+                idle_scrolls += 1
+
+            if scrolls >= max_scrolls or idle_scrolls >= 2 or harvest_seconds >= time_budget:
+                log.info("[harvest_tweets] Stopping after %s scrolls (%.1fs), %s tweets seen for '%s' (%s)",
+                         scrolls, harvest_seconds, len(seen), query, tab)
+                return
+            scrolls += 1
+            started = time.time()
+            tweets = self.scroll_for_tweets(seen)
+            harvest_seconds += time.time() - started
+
+    def find_tweet(self, tweet_id):
+        """Re-snapshot the page and return the current record for tweet_id, or None if it is no longer rendered."""
+        for tweet in self.extract_tweets():
+            if tweet.get('id') == tweet_id:
+                return tweet
+        return None
+
+    def get_tweet_id(self, tweet):
+        return tweet.get('id')
+
+    def is_own_tweet(self, tweet):
+        if tweet.get('author') == self.username.lower():
+            log.debug("[is_own_tweet] Own tweet found: %s", tweet.get('id'))
+            return True
+        return False
+
+    def is_reply_tweet(self, tweet):
+        if tweet.get('is_reply'):
+            log.debug("[is_reply_tweet] Reply tweet found: %s", tweet.get('id'))
+            return True
+        return False
+
+    def build_persona_prompt(self):
+        """Persona and reply rules shared by single and batched generation."""
+        # Mohit Nagaraj's background and skills
+        mohit_bio = (
+            "You are Mohit Nagaraj, a Computer Science and Engineering student at Dayananda Sagar College Of Engineering (graduating 2026, CGPA 9.23). "
+            "You have strong technical skills: JavaScript, TypeScript, Go, Dart, C++. "
+            "You work with React, Next.js, Node.js + Express, PostgreSQL, MongoDB, Firestore, Flutter, Git, Redis, and Cloud. "
+            "You are experienced with Tailwind, Three.js, OAuth, tRPC, Redux, Context, Firebase, Passport, Prisma, Bootstrap, RESTful API, GraphQL, gRPC, GoFiber, Gin, and Nginx. "
+            "Notable projects: Solace (GitHub deploy platform with Docker, AWS S3, Node.js, Redis), VidStreamX (Go, FFmpeg, Docker, AWS S3/SQS), WeChat (React, Vite, Express, Socket.io, MongoDB, AWS EC2/CloudFront), Exsense (Vite, Express, Apollo GraphQL, MongoDB, Passport). "
+            "Experience: Frontend Developer at Boho, SellerSetu (Nov 2024 - Feb 2025, Expo React Native, payments, Zustand, React Query), SDE Intern at Springreen (Sep 2024 - Dec 2024, Flask, Golang, CI/CD, microservices on EC2). "
+            "Achievements: 1st place Innerve 9 AIT Pune Hackathon (AI EdTech), 2nd place GoFr Hackathon (AI social outreach), Hacktoberfest 2024 open-source contributor. "
+            "You are passionate about building, learning, and sharing in the tech community. "
+        )
 
-            prompt = f"""
+        return f"""
             {mohit_bio}
             Your goal is to increase your outreach on Twitter by providing valuable, engaging, and sometimes humorous or assertive comments.
 
-            TONE: {selected_tone}
-
             CRITICAL RULES - YOU MUST FOLLOW THESE:
             1. ABSOLUTELY NO EMOJIS - Do not use ANY emoji characters whatsoever
             2. ABSOLUTELY NO HASHTAGS - Do not use # symbol or hashtags
-            3. Use ONLY plain ASCII text characters
+            3. {"Use ONLY plain ASCII text characters" if self.ascii_only else "Use plain text only, no decorative symbols"}
             4. Keep replies under 200 characters
             5. Be relevant to the tweet's content
             6. Sound natural and conversational
             7. Project confidence and expertise
             8. Use simple punctuation only (. , ! ? - ')
+            """
+
+    def sanitize_reply(self, ai_reply):
+        """Strip hashtags, emojis and control characters (and non-ASCII ones under ascii_only) from a generated reply."""
+        ai_reply = self.clean_text(ai_reply)
+
+        # First remove hashtags
+        ai_reply = re.sub(r'#\S+', '', ai_reply).strip()
+
+        # Remove emoji; other characters outside the BMP (math letters, CJK extensions) are kept
+        emoji_pattern = re.compile("["
+            u"\U0001F600-\U0001F64F"  # emoticons
+            u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+            u"\U0001F680-\U0001F6FF"  # transport & map symbols
+            u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+            u"\U00002702-\U000027B0"
+            u"\U000024C2"            # circled M
+            u"\U00002600-\U000026FF"  # miscellaneous symbols
+            u"\U0001F170-\U0001F251"  # enclosed alphanumerics and ideographs
+            u"\U0000FE0F\U0000200D"   # emoji variation selector and zero-width joiner
+            u"\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
+            u"\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
+            u"\U000E0020-\U000E007F"  # tag characters (subdivision flags)
+            "]+", flags=re.UNICODE)
+        ai_reply = emoji_pattern.sub('', ai_reply)
+
+        # Drop control characters, and everything outside ASCII if that policy is on
+        ai_reply = ''.join(char for char in ai_reply
+                           if char.isprintable() and (ord(char) < 128 or not self.ascii_only))
+        # Removed symbols leave runs of spaces behind
+        ai_reply = ' '.join(ai_reply.split())
+
+        if len(ai_reply) > 280:
+            ai_reply = ai_reply[:277] + "..."
+        return ai_reply
+
+    def generate_ai_response(self, tweet_text):
+        log.debug("[generate_ai_response] Called with tweet_text: %s", tweet_text)
+        try:
+            selected_tone = random.choice(REPLY_TONES)
+
+            prompt = f"""{self.build_persona_prompt()}
+            TONE: {selected_tone}
 
             Tweet to respond to: "{tweet_text}"
 
             Generate a SHORT reply (under 200 chars) with NO EMOJIS and NO HASHTAGS:"""
 
-            response = self.models.generate_content(
-                model="gemini-2.0-flash-exp",
-                contents=prompt
-            )
-            ai_reply = response.text.strip().strip('"')
+            with self.metrics.span('llm'):
+                response = self.models.generate_content(
+                    model=GEMINI_MODEL,
+                    contents=prompt
+                )
+            ai_reply = self.sanitize_reply(response.text.strip().strip('"'))
 
-            ai_reply = self.clean_text(ai_reply)
-            
-            # Remove any emojis and hashtags that might have been generated
-            import re
-            # First remove hashtags
-            ai_reply = re.sub(r'#\S+', '', ai_reply).strip()
-            
-            # Remove all emoji characters and other non-ASCII
-            # More comprehensive emoji removal pattern
-            emoji_pattern = re.compile("["
-                u"\U0001F600-\U0001F64F"  # emoticons
-                u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-                u"\U0001F680-\U0001F6FF"  # transport & map symbols
-                u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
-                u"\U00002702-\U000027B0"
-                u"\U000024C2-\U0001F251"
-                u"\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-                u"\U00010000-\U0010FFFF"  # other planes
-                "]+", flags=re.UNICODE)
-            ai_reply = emoji_pattern.sub('', ai_reply)
-            
-            # Final aggressive ASCII-only filter for ChromeDriver compatibility
-            ai_reply = ''.join(char for char in ai_reply if ord(char) < 128 and char.isprintable())
+            log.debug("[generate_ai_response] AI reply (tone: %s): %s", selected_tone, ai_reply)
+            return ai_reply
 
-            if len(ai_reply) > 280:
-                ai_reply = ai_reply[:277] + "..."
+        except Exception as e:
+            log.error("Error generating AI response: %s", e)
+            self.metrics.inc('failures', stage='llm')
+            self.metrics.inc('llm_fallbacks')
+            return FALLBACK_REPLY
 
-            print(f"Generated AI response (tone: {selected_tone}): {ai_reply}")
-            print(f"[generate_ai_response] AI reply: {ai_reply}")
-            return ai_reply
+    def generate_ai_responses(self, tweets):
+        """Return a {tweet_id: reply} dict covering every tweet record passed in.
+
+        Near-duplicates of recently answered tweets are served from the reply cache; the
+        rest are generated in one batched request (or a single call when only one is left).
+        """
+        log.debug("[generate_ai_responses] Called with %s tweets.", len(tweets))
+        replies = {}
+        uncached = []
+        for tweet in tweets:
+            cached = self.reply_cache.get(tweet['text']) if self.reply_cache else None
+            if cached:
+                log.debug("[generate_ai_responses] Reply cache hit for %s", tweet['id'])
+                self.metrics.inc('reply_cache_hits')
+                replies[tweet['id']] = cached
+            else:
+                uncached.append(tweet)
+
+        if len(uncached) == 1:
+            generated = {uncached[0]['id']: self.generate_ai_response(uncached[0]['text'])}
+        elif uncached:
+            generated = self.generate_ai_batch(uncached)
+        else:
+            generated = {}
+
+        for tweet in uncached:
+            ai_reply = generated[tweet['id']]
+            if self.reply_cache and ai_reply != FALLBACK_REPLY:
+                self.reply_cache.put(tweet['text'], ai_reply)
+            replies[tweet['id']] = ai_reply
+        return replies
+
+    def generate_ai_batch(self, tweets):
+        """Generate replies for several tweet records in one Gemini request.
+
+        The model answers with a JSON array of {tweet_id, reply} objects. Entries that are
+        missing or fail validation fall back to generate_ai_response, so the returned
+        {tweet_id: reply} dict always covers every tweet passed in.
+        """
+        log.debug("[generate_ai_batch] Called with %s tweets.", len(tweets))
+        replies = {}
+        try:
+            tweet_lines = "\n".join(
+                f'- tweet_id: {tweet["id"]} | TONE: {random.choice(REPLY_TONES)} | Tweet: {json.dumps(tweet["text"], ensure_ascii=False)}'
+                for tweet in tweets
+            )
+            prompt = f"""{self.build_persona_prompt()}
+            Write one reply for EACH of the following tweets, in the tone given for it:
+            {tweet_lines}
+
+            Respond with a JSON array containing one object per tweet with its "tweet_id" and your "reply"
+            (under 200 chars, NO EMOJIS, NO HASHTAGS)."""
 
+            with self.metrics.span('llm_batch'):
+                response = self.models.generate_content(
+                    model=GEMINI_MODEL,
+                    contents=prompt,
+                    config={
+                        'response_mime_type': 'application/json',
+                        'response_schema': {
+                            'type': 'ARRAY',
+                            'items': {
+                                'type': 'OBJECT',
+                                'properties': {
+                                    'tweet_id': {'type': 'STRING'},
+                                    'reply': {'type': 'STRING'},
+                                },
+                                'required': ['tweet_id', 'reply'],
+                            },
+                        },
+                    }
+                )
+            wanted = {tweet['id'] for tweet in tweets}
+            for entry in json.loads(response.text):
+                if not isinstance(entry, dict) or entry.get('tweet_id') not in wanted:
+                    continue
+                if not isinstance(entry.get('reply'), str):
+                    continue
+                ai_reply = self.sanitize_reply(entry['reply'])
+                if ai_reply:
+                    replies[entry['tweet_id']] = ai_reply
         except Exception as e:
-            print(f"Error generating AI response: {str(e)}")
-            return "cool"
+            log.error("[generate_ai_batch] Batch generation failed: %s", e)
+            self.metrics.inc('failures', stage='llm_batch')
+
+        log.info("[generate_ai_batch] Batch returned %s/%s valid replies.", len(replies), len(tweets))
+        for tweet in tweets:
+            if tweet['id'] not in replies:
+                log.debug("[generate_ai_batch] Falling back to single generation for %s", tweet['id'])
+                self.metrics.inc('llm_batch_fallbacks')
+                replies[tweet['id']] = self.generate_ai_response(tweet['text'])
+        return replies
 
     def monitor_and_reply(self, interval=60 * 5):
-        print(f"[monitor_and_reply] Called with interval: {interval}")
+        log.debug("[monitor_and_reply] Called with interval: %s", interval)
         if not self.login():
-            print("Failed to login. Please check your credentials.")
+            log.error("Failed to login. Please check your credentials.")
             return
 
-        processed_tweets = set()
-        print("Starting to monitor tech tweets...")
-        max_tweets_per_tab = 5  # Limit tweets per tab
+        log.info("Starting to monitor tech tweets...")
+        # interval is now the shortest time before the same query is searched again
+        scheduler = QueryScheduler(self.tech_search_queries, query_stats_path(), min_revisit=interval)
+
+        # Finish the query a previous run was in the middle of
+        resume_query = self.checkpoint.state.get('query')
+        if resume_query in self.tech_search_queries:
+            scheduler.record(resume_query, **self.process_query(resume_query, resume=True))
+            self.watchdog()
 
         while True:
-            random.shuffle(self.tech_search_queries)
-            for query in self.tech_search_queries:
-                try:
-                    print(f"\n{'='*50}")
-                    print(f"Processing query: {query}")
-                    print(f"{'='*50}")
-                    
-                    # Process Top tab first
-                    print(f"\n--- Processing TOP tab for '{query}' ---")
-                    top_tweets = self.search_tweets(query, tab="top")
-                    print(f"Found {len(top_tweets)} tweets in Top tab for '{query}'")
-                    
-                    tweets_processed_top = 0
-                    tweet_index = 0
-                    while tweets_processed_top < max_tweets_per_tab and tweet_index < len(top_tweets):
-                        tweet = top_tweets[tweet_index]
-                        tweet_index += 1
-                        
-                        try:
-                            tweet_id = self.get_tweet_id(tweet)
-                            if not tweet_id or tweet_id in processed_tweets:
-                                time.sleep(2)  # Wait 2 seconds even for skipped tweets
-                                continue
-
-                            # Check if tweet is already liked (to prevent duplicate comments)
-                            if self.is_tweet_already_liked(tweet):
-                                print(f"Tweet {tweet_id} already liked, skipping...")
-                                processed_tweets.add(tweet_id)
-                                time.sleep(2)  # Wait 2 seconds
-                                continue
-
-                            if self.is_blocked_handle(tweet) or self.is_own_tweet(tweet) or self.is_reply_tweet(tweet):
-                                time.sleep(2)  # Wait 2 seconds
-                                continue
-                            
-                            print(f"Processing tweet: {tweet_id}")
-                            reply_result = self.reply_to_tweet(tweet)
-                            
-                            if reply_result is None:
-                                # Tweet had no text, don't count it towards the 5
-                                print(f"Tweet {tweet_id} had no text, not counting towards limit")
-                                time.sleep(2)  # Wait 2 seconds
-                                continue
-                            elif reply_result:
-                                processed_tweets.add(tweet_id)
-                                tweets_processed_top += 1
-                                print(f"Successfully replied to tweet: {tweet_id}")
-                                time.sleep(random.uniform(20, 40))
-                            else:
-                                print(f"Failed to reply to tweet: {tweet_id}")
-                                time.sleep(2)  # Wait 2 seconds
-
-                        except Exception as e:
-                            print(f"Error processing a tweet: {str(e)}")
-                            time.sleep(2)  # Wait 2 seconds
-                            continue
-                    
-                    print(f"Processed {tweets_processed_top} tweets from Top tab for query '{query}'")
-                    
-                    # Now process Latest tab
-                    print(f"\n--- Processing LATEST tab for '{query}' ---")
-                    latest_tweets = self.search_tweets(query, tab="latest")
-                    print(f"Found {len(latest_tweets)} tweets in Latest tab for '{query}'")
-                    
-                    tweets_processed_latest = 0
-                    tweet_index = 0
-                    while tweets_processed_latest < max_tweets_per_tab and tweet_index < len(latest_tweets):
-                        tweet = latest_tweets[tweet_index]
-                        tweet_index += 1
-                        
-                        try:
-                            tweet_id = self.get_tweet_id(tweet)
-                            if not tweet_id or tweet_id in processed_tweets:
-                                time.sleep(2)  # Wait 2 seconds even for skipped tweets
-                                continue
-
-                            # Check if tweet is already liked (to prevent duplicate comments)
-                            if self.is_tweet_already_liked(tweet):
-                                print(f"Tweet {tweet_id} already liked, skipping...")
-                                processed_tweets.add(tweet_id)
-                                time.sleep(2)  # Wait 2 seconds
-                                continue
-
-                            if self.is_blocked_handle(tweet) or self.is_own_tweet(tweet) or self.is_reply_tweet(tweet):
-                                time.sleep(2)  # Wait 2 seconds
-                                continue
-                            
-                            print(f"Processing tweet: {tweet_id}")
-                            reply_result = self.reply_to_tweet(tweet)
-                            
-                            if reply_result is None:
-                                # Tweet had no text, don't count it towards the 5
-                                print(f"Tweet {tweet_id} had no text, not counting towards limit")
-                                time.sleep(2)  # Wait 2 seconds
-                                continue
-                            elif reply_result:
-                                processed_tweets.add(tweet_id)
-                                tweets_processed_latest += 1
-                                print(f"Successfully replied to tweet: {tweet_id}")
-                                time.sleep(random.uniform(20, 40))
-                            else:
-                                print(f"Failed to reply to tweet: {tweet_id}")
-                                time.sleep(2)  # Wait 2 seconds
-
-                        except Exception as e:
-                            print(f"Error processing a tweet: {str(e)}")
-                            time.sleep(2)  # Wait 2 seconds
-                            continue
-                    
-                    print(f"Processed {tweets_processed_latest} tweets from Latest tab for query '{query}'")
-                    print(f"Total processed for '{query}': {tweets_processed_top + tweets_processed_latest} tweets")
-                    
-                    # Add 10 second delay between queries
-                    print(f"Waiting 10 seconds before next query...")
-                    time.sleep(10)
+            for _ in range(len(self.tech_search_queries)):
+                query, wait = scheduler.next_query()
+                if query is None:
+                    log.info("No query is due yet. Waiting %.0f seconds...", wait)
+                    time.sleep(wait)
+                    continue
+                result = self.process_query(query)
+                scheduler.record(query, **result)
+                self.watchdog()
 
-                except Exception as e:
-                    print(f"An error occurred while processing query '{query}': {str(e)}")
+            self.processed_tweets.evict()
+            if self.reply_cache:
+                stats = self.reply_cache.stats()
+                log.info("Reply cache: %s hits / %s misses (%.0f%% hit rate), %s generations saved, %s variants added, %s entries",
+                         stats['hits'], stats['misses'], stats['hit_rate'] * 100, stats['generations_saved'],
+                         stats['variants_added'], stats['entries'])
+
+            self.log_browser_stats()
+
+            if self.tweet_filter.hits:
+                log.info("Filter rules fired most: %s", ", ".join(
+                    f"{rule} ({count})" for rule, count in self.tweet_filter.hits.most_common(5)))
+
+            log.info("Action budget:")
+            for line in self.rate_limiter.summary():
+                log.info("  %s", line)
+
+            log.info("Query yield so far:")
+            for query, stats in scheduler.summary():
+                log.info("  %s: %s replies / %s eligible in %s visits, revisit every %.0f min",
+                         query, stats['replies'], stats['eligible'], stats['visits'], stats['revisit_interval'] / 60)
+            self.metrics.export()
+
+    def check_driver_health(self):
+        """Return (kind, detail) if Chrome should be recycled, or None if it's healthy."""
+        try:
+            self.driver.execute_script("return 1;")
+        except Exception as e:
+            return 'unresponsive', f"driver not responding: {e}"
+        age = time.time() - getattr(self, 'driver_started', time.time())
+        self.metrics.set('driver_age_seconds', round(age))
+        if self.watchdog_limits.get('max_age_hours') and age > self.watchdog_limits['max_age_hours'] * 3600:
+            return 'age', f"driver running for {age / 3600:.1f}h"
+        try:
+            metrics = {m['name']: m['value'] for m in self.driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']}
+        except Exception as e:
+            log.debug("[check_driver_health] Performance metrics unavailable: %s", e)
+            return None
+        heap_mb = metrics.get('JSHeapUsedSize', 0) / 2 ** 20
+        nodes = metrics.get('Nodes', 0)
+        self.metrics.set('driver_js_heap_bytes', metrics.get('JSHeapUsedSize', 0))
+        self.metrics.set('driver_dom_nodes', nodes)
+        if self.watchdog_limits.get('js_heap_mb') and heap_mb > self.watchdog_limits['js_heap_mb']:
+            return 'js_heap', f"JS heap at {heap_mb:.0f} MB"
+        if self.watchdog_limits.get('dom_nodes') and nodes > self.watchdog_limits['dom_nodes']:
+            return 'dom_nodes', f"{nodes:.0f} DOM nodes"
+        return None
+
+    def watchdog(self):
+        """Recycle Chrome if it's hung, bloated or too old, and log back in. Raises if the new driver can't log in."""
+        problem = self.check_driver_health()
+        if problem is None:
+            return
+        kind, detail = problem
+        log.warning("[watchdog] Restarting Chrome: %s", detail)
+        self.metrics.inc('driver_restarts', reason=kind)
+        if kind != 'unresponsive' and self.logged_in:
+            self.save_cookies()
+        try:
+            self.driver.quit()
+        except Exception as e:
+            log.debug("[watchdog] Error quitting the old driver: %s", e)
+        self.logged_in = False
+        self.setup_driver()
+        if not self.login():
+            raise RuntimeError("could not log back in after restarting Chrome")
+
+    def log_browser_stats(self):
+        """Log median page load time and the latest renderer memory for the browser mode in use."""
+        snapshot = self.metrics.snapshot()
+        mode = self.browser_mode
+        load = snapshot['stages'].get(f'page_load_{mode}') or snapshot['stages'].get(f'page_dom_ready_{mode}')
+        gauges = {name: entry['value'] for name, series in snapshot['gauges'].items()
+                  for entry in series if entry['labels'].get('mode') == mode}
+        if not load:
+            return
+        log.info("Browser (%s mode): median page load %.2fs over %s pages, JS heap %.0f MB, %s DOM nodes, %.0f kB per page",
+                 mode, load['quantiles']['0.5'], load['count'], (gauges.get('renderer_js_heap_bytes') or 0) / 2 ** 20,
+                 gauges.get('renderer_dom_nodes'), (gauges.get('page_transferred_bytes') or 0) / 1024)
+
+    def process_query(self, query, max_tweets_per_tab=5, resume=False):
+        """Reply to tweets from the Top and Latest tabs for one query.
+
+        With resume=True and a checkpoint for this query, starts at the checkpointed tab and
+        counts the replies already made there. Returns a dict with the replies, eligible
+        tweets and page loads it took, plus the seconds spent.
+        """
+        started = time.time()
+        result = {'replies': 0, 'eligible': 0, 'page_loads': 0}
+        self.tweet_filter.reload_if_changed()
+        tabs = ["top", "latest"]
+        done_in_tab = 0
+        if resume and self.checkpoint.state.get('query') == query:
+            tabs = tabs[tabs.index(self.checkpoint.state['tab']):]
+            done_in_tab = self.checkpoint.state['tab_replies']
+            # The dedupe store may not have seen replies from a worker that died mid-write
+            for tweet_id in self.checkpoint.state['replied']:
+                if tweet_id not in self.processed_tweets:
+                    self.processed_tweets.add(tweet_id, "replied")
+            log.info("Resuming '%s' at the %s tab (%s replies already made there)", query, tabs[0], done_in_tab)
+        else:
+            self.checkpoint.clear()
+        try:
+            log.info("=== Processing query: %s ===", query)
+
+            # Process Top tab first, then Latest
+            for tab in tabs:
+                remaining = max_tweets_per_tab - done_in_tab
+                done_in_tab = 0
+                if remaining <= 0:
                     continue
-            
-            if len(processed_tweets) > 500:
-                print("Cleaning up processed tweets list...")
-                processed_list = list(processed_tweets)
-                processed_tweets = set(processed_list[-500:])
+                self.checkpoint.start_tab(query, tab)
+                tab_result = self.process_search_tab(query, tab, self.processed_tweets, remaining)
+                for key in result:
+                    result[key] += tab_result[key]
+            log.info("Total processed for '%s': %s tweets", query, result['replies'])
+            self.checkpoint.clear()
+
+        except Exception as e:
+            log.error("An error occurred while processing query '%s': %s", query, e)
+
+        result['seconds'] = time.time() - started
+        # X rotates ct0 and friends during a session; keep the file current for the next start
+        self.save_cookies()
+        self.metrics.observe('query', result['seconds'])
+        self.metrics.export()
+        return result
+
+    def get_skip_reason(self, tweet, processed_tweets):
+        """Run every filter on an extracted tweet record. Returns the reason to skip it, or None."""
+        tweet_id = self.get_tweet_id(tweet)
+        if not tweet_id:
+            return "no_id"
+        if tweet_id in processed_tweets:
+            return "processed"
+        # Already liked means we most likely commented already
+        if self.is_tweet_already_liked(tweet):
+            return "liked"
+        filtered = self.tweet_filter.check(tweet)
+        if filtered:
+            reason, rule = filtered
+            log.debug("[get_skip_reason] Tweet %s %s by %s", tweet_id, reason, rule)
+            return reason
+        if self.is_own_tweet(tweet):
+            return "own"
+        if self.is_reply_tweet(tweet):
+            return "reply"
+        if not tweet.get('text'):
+            return "no_text"
+        return None
+
+    def process_search_tab(self, query, tab, processed_tweets, max_tweets):
+        """Search one tab for a query and reply to up to max_tweets eligible tweets.
+
+        Returns a dict with the number of replies, eligible tweets seen and page loads.
+
+        The timeline is harvested incrementally: each batch of newly rendered tweets is
+        filtered and replied to while it's on screen, and scrolling continues only until
+        enough replies have been made.
+        """
+        log.info("--- Processing %s tab for '%s' ---", tab.upper(), query)
+        replied = 0
+        eligible = 0
+        harvest = self.harvest_tweets(query, tab=tab)
+        try:
+            for tweets in harvest:
+                candidates, page_eligible = self.filter_candidates(tweets, processed_tweets, query, max_tweets - replied)
+                eligible += page_eligible
+                log.info("%s/%s new tweets eligible in %s tab for '%s'", page_eligible, len(tweets), tab, query)
+                replied += self.reply_to_candidates(candidates, processed_tweets, max_tweets - replied)
+                if replied >= max_tweets:
+                    break
+        finally:
+            harvest.close()
+
+        log.info("Processed %s tweets from %s tab for query '%s'", replied, tab.capitalize(), query)
+        return {'replies': replied, 'eligible': eligible, 'page_loads': 1}
+
+    def filter_candidates(self, tweets, processed_tweets, query='', limit=None):
+        """Run the filters over tweet records (pure Python) and rank the survivors.
+
+        Returns the tweets we've claimed for a reply, best first, and the number that passed
+        the filters and the ranker's threshold. At most limit tweets (besides allowlisted ones)
+        are claimed, so replies aren't generated for tweets we won't get to.
+        """
+        eligible = []
+        with self.metrics.span('filtering'):
+            for tweet in tweets:
+                tweet_id = self.get_tweet_id(tweet)
+                skip_reason = self.get_skip_reason(tweet, processed_tweets)
+                if skip_reason:
+                    log.debug("Skipping tweet %s: %s", tweet_id, skip_reason)
+                    self.metrics.inc('skips', reason=skip_reason)
+                    # Remember filtered tweets so the next cycle doesn't re-evaluate them
+                    if skip_reason not in ("no_id", "processed"):
+                        processed_tweets.add(tweet_id, skip_reason)
+                    continue
+                eligible.append(tweet)
+
+        # Allowlisted authors are kept and come first
+        with self.metrics.span('ranking'):
+            ranked, dropped = self.ranker.select(eligible, query, priority=self.tweet_filter.is_priority, limit=limit)
+        eligible = len(ranked)
+        for tweet, reason in dropped:
+            self.metrics.inc('skips', reason=reason)
+            if reason == "ranked_out":
+                eligible += 1
+        # Dropped tweets aren't recorded: scores depend on the query and on document
+        # frequencies still being learned, and re-scoring one is cheap
+
+        candidates = []
+        for tweet in ranked:
+            tweet_id = self.get_tweet_id(tweet)
+            # In multi-account mode this also stops two accounts replying to the same tweet
+            if not processed_tweets.claim(tweet_id):
+                log.debug("Skipping tweet %s: claimed by another account", tweet_id)
+                self.metrics.inc('skips', reason='claimed')
+                continue
+            candidates.append(tweet)
+        return candidates, eligible
+
+    def reply_to_candidates(self, candidates, processed_tweets, max_tweets):
+        """Reply to up to max_tweets of the claimed candidates. Returns the reply count."""
+        # Generate replies in the worker pool while the browser handles earlier tweets.
+        # Tweets go to the model in batches of ai_batch_size, and the next batch is
+        # requested as soon as we start consuming the current one.
+        queued = iter(candidates)
+        pending = deque()
+        lookahead = max(self.ai_workers, self.ai_batch_size)
 
-            print(f"\nFinished a cycle of queries. Waiting {interval} seconds before the next cycle...")
-            time.sleep(interval)
+        def fill_pending():
+            while len(pending) < lookahead:
+                batch = list(itertools.islice(queued, self.ai_batch_size))
+                if not batch:
+                    return
+                ai_replies = self.ai_executor.submit(self.generate_ai_responses, batch)
+                pending.extend((tweet, ai_replies) for tweet in batch)
+
+        fill_pending()
+        replied = 0
+        while pending and replied < max_tweets:
+            tweet, ai_replies = pending.popleft()
+            fill_pending()
+            try:
+                tweet_id = self.get_tweet_id(tweet)
+                log.debug("Processing tweet: %s", tweet_id)
+                reply_result = self.reply_to_tweet(tweet, ai_replies)
+
+                if reply_result is None:
+                    # Tweet had no text, don't count it towards the limit
+                    log.info("Tweet %s had no text, not counting towards limit", tweet_id)
+                    processed_tweets.add(tweet_id, "no_text")
+                    continue
+                elif reply_result:
+                    processed_tweets.add(tweet_id, "replied")
+                    self.checkpoint.replied(tweet_id)
+                    replied += 1
+                    self.metrics.inc('replies')
+                    log.info("Successfully replied to tweet: %s", tweet_id)
+                else:
+                    log.error("Failed to reply to tweet: %s", tweet_id)
+                    self.metrics.inc('failures', stage='reply')
+                    self.pacing.pause('after_failure')
+
+            except Exception as e:
+                log.error("Error processing a tweet: %s", e)
+                self.pacing.pause('after_failure')
+                continue
+
+        # Drop generations we no longer need (already-running ones just finish unused)
+        for _, ai_replies in pending:
+            ai_replies.cancel()
+        # Hand back claims on tweets we didn't reply to (no-op for ones already recorded)
+        for tweet in candidates:
+            processed_tweets.release(self.get_tweet_id(tweet))
+
+        return replied
 
     def cleanup(self):
-        print("[cleanup] Called.")
+        log.debug("[cleanup] Called.")
         if hasattr(self, 'driver'):
+            if getattr(self, 'logged_in', False):
+                self.save_cookies()
             self.driver.quit()
-        print("[cleanup] Browser closed.")
+        log.debug("[cleanup] Browser closed.")
+        if hasattr(self, 'ai_executor'):
+            self.ai_executor.shutdown(wait=False, cancel_futures=True)
+        if hasattr(self, 'processed_tweets'):
+            self.processed_tweets.close()
 
     def clean_text(self, text):
         """Clean the AI-generated text (strip whitespace, remove unwanted characters, etc)."""
-        print(f"[clean_text] Called with text: {text}")
+        log.debug("[clean_text] Called with text: %s", text)
         # Basic cleaning: strip whitespace, remove leading/trailing quotes, and remove all '*' characters
-        cleaned = text.strip().strip('"').replace('*', '')
-        print(f"[clean_text] Returning: {cleaned}")
+        cleaned = text.strip().strip('"“”').replace('*', '')
+        log.debug("[clean_text] Returning: %s", cleaned)
         return cleaned
 
-    def reply_to_tweet(self, tweet_element):
-        """Reply to a tweet using Selenium. Log the tweet_id and the AI-generated reply. Return True if successful, False otherwise."""
-        print("[reply_to_tweet] Called.")
+    def reply_to_tweet(self, tweet, ai_reply=None, retry_stale=True):
+        """Reply to an extracted tweet record using Selenium. Log the tweet_id and the AI-generated reply. Return True if successful, False otherwise.
+
+        ai_reply may be the reply text, a Future from the generation pool resolving to a
+        {tweet_id: reply} dict (resolved after the like, so the browser works while the model
+        is still generating) or None to generate inline. If the timeline re-rendered the tweet
+        since it was snapshotted, it is looked up again by ID and retried once.
+        """
+        log.debug("[reply_to_tweet] Called.")
         try:
-            tweet_id = self.get_tweet_id(tweet_element)
-            print(f"[reply_to_tweet] Processing tweet_id: {tweet_id}")
+            tweet_id = self.get_tweet_id(tweet)
+            log.debug("[reply_to_tweet] Processing tweet_id: %s", tweet_id)
             
-            # Extract tweet text for context FIRST
-            tweet_text = ""
-            try:
-                tweet_text_elem = tweet_element.find_element(By.CSS_SELECTOR, '[data-testid="tweetText"]')
-                tweet_text = tweet_text_elem.text.strip()
-            except Exception as e:
-                print(f"[reply_to_tweet] Could not extract tweet text: {str(e)}")
+            # Tweet text was captured by the snapshot
+            tweet_text = tweet.get('text', '')
             
             # Skip if no tweet text found
             if not tweet_text:
-                print(f"[reply_to_tweet] No text content in tweet {tweet_id}, skipping...")
+                log.info("[reply_to_tweet] No text content in tweet %s, skipping...", tweet_id)
                 return None  # Return None to indicate skip, not failure
             
-            # Like the tweet before replying with improved interaction
+            # Like the tweet before replying with improved interaction (a retried record may already be liked)
             try:
-                like_button = tweet_element.find_element(By.CSS_SELECTOR, '[data-testid="like"]')
+                if tweet.get('liked'):
+                    raise ValueError("tweet is already liked")
+                like_button = tweet.get('like_button')
+                if like_button is None:
+                    raise ValueError("like button not present in tweet snapshot")
+                self.rate_limiter.acquire('like')
                 # Scroll element into view
                 self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", like_button)
-                time.sleep(1)
-                # Try JavaScript click if regular click fails
-                try:
-                    like_button.click()
-                except:
-                    self.driver.execute_script("arguments[0].click();", like_button)
-                print(f"[reply_to_tweet] Liked tweet: {tweet_id}")
-                time.sleep(1)
+                self.pacing.pause('before_click')
+                with self.metrics.span('like'):
+                    # Try JavaScript click if regular click fails
+                    try:
+                        like_button.click()
+                    except:
+                        self.driver.execute_script("arguments[0].click();", like_button)
+                    # The like is registered once the button flips to "unlike"
+                    try:
+                        self.wait_for(lambda d: tweet['element'].find_elements(By.CSS_SELECTOR, '[data-testid="unlike"]'), timeout=5)
+                        log.debug("[reply_to_tweet] Liked tweet: %s", tweet_id)
+                    except TimeoutException:
+                        log.warning("[reply_to_tweet] Like not confirmed for tweet: %s", tweet_id)
+                        self.metrics.inc('failures', stage='like')
+            except StaleElementReferenceException:
+                raise
             except Exception as e:
-                print(f"[reply_to_tweet] Could not like tweet: {str(e)}")
+                log.warning("[reply_to_tweet] Could not like tweet: %s", e)
+                self.metrics.inc('failures', stage='like')
             
-            ai_reply = self.generate_ai_response(tweet_text)
-            print(f"[reply_to_tweet] AI reply: {ai_reply}")
+            if ai_reply is None:
+                ai_reply = self.generate_ai_response(tweet_text)
+            elif hasattr(ai_reply, 'result'):
+                ai_reply = ai_reply.result()[tweet_id]
+            log.debug("[reply_to_tweet] AI reply: %s", ai_reply)
             
             # Find and click the reply button with improved interaction
             try:
-                reply_button = tweet_element.find_element(By.CSS_SELECTOR, '[data-testid="reply"]')
+                reply_button = tweet.get('reply_button')
+                if reply_button is None:
+                    raise ValueError("reply button not present in tweet snapshot")
+                self.rate_limiter.acquire('reply')
                 # Scroll element into view and ensure it's clickable
                 self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", reply_button)
-                time.sleep(1)
+                self.pacing.pause('before_click')
+                reply_started = time.perf_counter()
                 # Try JavaScript click if regular click fails
                 try:
                     reply_button.click()
                 except:
                     self.driver.execute_script("arguments[0].click();", reply_button)
-                time.sleep(2)
+            except StaleElementReferenceException:
+                raise
             except Exception as e:
-                print(f"[reply_to_tweet] Could not click reply button: {str(e)}")
+                log.warning("[reply_to_tweet] Could not click reply button: %s", e)
                 return False
             
-            # Find the reply text area (should be the only textarea visible)
+            # Wait for the reply dialog's text area to be interactable
             reply_box = self.wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'div[role="dialog"] div[role="textbox"]'))
+                EC.element_to_be_clickable((By.CSS_SELECTOR, 'div[role="dialog"] div[role="textbox"]'))
             )
-            reply_box.send_keys(ai_reply)
-            time.sleep(1)
+            if not self.insert_reply_text(reply_box, ai_reply):
+                log.warning("[reply_to_tweet] Composer does not contain the reply for tweet: %s", tweet_id)
+                self.metrics.inc('failures', stage='compose')
+                self.close_reply_dialog(reply_box)
+                return False
             
-            # Find and click the reply submit button
-            submit_buttons = tweet_element.parent.find_elements(By.CSS_SELECTOR, 'div[role="dialog"] [data-testid="tweetButton"]')
-            if not submit_buttons:
-                # Try global search if not found in parent
-                submit_buttons = self.driver.find_elements(By.CSS_SELECTOR, 'div[role="dialog"] [data-testid="tweetButton"]')
+            # The submit button enables once the composer has registered the text
+            try:
+                submit_button = self.wait_for(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, 'div[role="dialog"] [data-testid="tweetButton"]')),
+                    timeout=10
+                )
+            except TimeoutException:
+                log.warning("[reply_to_tweet] Could not find reply submit button for tweet: %s", tweet_id)
+                self.close_reply_dialog(reply_box)
+                return False
             
-            if submit_buttons:
-                submit_buttons[0].click()
-                print(f"[reply_to_tweet] Successfully replied to tweet: {tweet_id}")
-                time.sleep(2)
-                return True
-            else:
-                print(f"[reply_to_tweet] Could not find reply submit button for tweet: {tweet_id}")
+            self.pacing.pause('before_click')
+            submit_button.click()
+            
+            # The dialog closes once the reply has been accepted
+            try:
+                self.wait_for(EC.invisibility_of_element_located((By.CSS_SELECTOR, 'div[role="dialog"] [data-testid="tweetButton"]')), timeout=15)
+            except TimeoutException:
+                log.warning("[reply_to_tweet] Reply dialog did not close for tweet: %s", tweet_id)
                 return False
+            log.debug("[reply_to_tweet] Reply dialog closed for tweet: %s", tweet_id)
+            # Includes the composer and pre-submit pause, i.e. what one reply costs in browser time
+            self.metrics.observe('reply_submit', time.perf_counter() - reply_started)
+            return True
                 
+        except StaleElementReferenceException:
+            fresh = self.find_tweet(tweet_id) if retry_stale else None
+            if fresh is None:
+                log.warning("[reply_to_tweet] Tweet %s is no longer rendered", tweet_id)
+                return False
+            log.info("[reply_to_tweet] Tweet %s re-rendered, retrying with a fresh snapshot", tweet_id)
+            return self.reply_to_tweet(fresh, ai_reply, retry_stale=False)
         except Exception as e:
-            print(f"[reply_to_tweet] Error replying to tweet: {str(e)}")
+            log.error("[reply_to_tweet] Error replying to tweet: %s", e)
             return False
 
-    def is_tweet_already_liked(self, tweet_element):
-        """Check if a tweet is already liked by looking for the unlike button."""
-        print("[is_tweet_already_liked] Called.")
-        try:
-            # Check if unlike button exists (which means tweet is already liked)
-            unlike_button = tweet_element.find_element(By.CSS_SELECTOR, '[data-testid="unlike"]')
-            if unlike_button:
-                print("[is_tweet_already_liked] Tweet is already liked")
-                return True
-        except NoSuchElementException:
-            # No unlike button means tweet is not liked
-            print("[is_tweet_already_liked] Tweet is not liked")
+    def insert_reply_text(self, reply_box, text):
+        """Put text into the reply composer in one step, then check it. Returns True if the composer shows text.
+
+        DevTools Input.insertText commits the whole string like an IME would, so it costs the
+        same for any length and handles characters outside the BMP, which send_keys can't type.
+        Falls back to send_keys if the command isn't available.
+        """
+        with self.metrics.span('compose'):
+            reply_box.click()
+            try:
+                self.driver.execute_cdp_cmd('Input.insertText', {'text': text})
+            except Exception as e:
+                log.warning("[insert_reply_text] Input.insertText failed (%s), typing instead.", e)
+                reply_box.send_keys(text)
+            composed = self.driver.execute_script("return arguments[0].innerText;", reply_box) or ''
+        # The composer may add line breaks or non-breaking spaces of its own
+        if composed.split() != text.split():
+            log.debug("[insert_reply_text] Expected %r, composer shows %r", text, composed)
             return False
+        return True
+
+    def close_reply_dialog(self, reply_box):
+        """Empty the reply composer and close its dialog, so the next reply doesn't start from a dirty one.
+
+        Escape on a non-empty draft asks whether to discard it; that is confirmed too.
+        Returns True once no reply dialog is open.
+        """
+        try:
+            reply_box.send_keys(Keys.CONTROL, 'a')
+            reply_box.send_keys(Keys.DELETE)
+            reply_box.send_keys(Keys.ESCAPE)
+            discard = self.driver.find_elements(By.CSS_SELECTOR, '[data-testid="confirmationSheetConfirm"]')
+            if discard:
+                discard[0].click()
+            self.wait_for(EC.invisibility_of_element_located((By.CSS_SELECTOR, 'div[role="dialog"] div[role="textbox"]')), timeout=5)
+            return True
         except Exception as e:
-            print(f"[is_tweet_already_liked] Error checking like status: {str(e)}")
+            log.warning("[close_reply_dialog] Could not close the reply dialog: %s", e)
             return False
 
+    def is_tweet_already_liked(self, tweet):
+        """Check if a tweet is already liked (the snapshot saw an unlike button)."""
+        if tweet.get('liked'):
+            log.debug("[is_tweet_already_liked] Tweet %s is already liked", tweet.get('id'))
+            return True
+        return False
+
+
+def driver_cache_path():
+    return os.getenv('DRIVER_CACHE_FILE') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'driver_cache.json')
+
+
+def query_stats_path():
+    return os.getenv('QUERY_STATS_FILE') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'query_stats.json')
+
+
+# Exit code of a worker that must not be restarted (bad configuration, failed login)
+WORKER_EXIT_FATAL = 3
+
+
+def run_account_worker(account, query_queue, result_queue, dedupe):
+    """Worker process for one account: log in, then process queries from the shared queue until a None sentinel.
+
+    A query checkpointed by a previous run of this account is finished first. Every query
+    is announced with a {'started': True} message before it runs, and its result (or error)
+    is put on result_queue. The process exits with WORKER_EXIT_FATAL when restarting it
+    can't help, and with 1 after any other crash.
+    """
+    name = account['username']
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    bot = None
+    query = None
+    exit_code = 0
+    # Forked from the supervisor, which may have been running for hours
+    mark_startup()
+    configure_logging()
+    # Each worker exports its own metrics file next to METRICS_FILE
+    metrics_file = os.getenv('METRICS_FILE')
+    if metrics_file:
+        root, ext = os.path.splitext(metrics_file)
+        metrics_file = f"{root}_{name}{ext}"
+
+    def run_query(query, queued, resume=False):
+        result_queue.put({'worker': name, 'query': query, 'started': True, 'queued': queued})
+        result = bot.process_query(query, resume=resume)
+        result_queue.put(dict(result, worker=name, query=query))
+        bot.watchdog()
 
-def main():
-    print("\n" + "="*50)
-    print("   TWITTER BOT STARTING")
-    print("="*50)
-    
     try:
-        print("\nCreating TwitterBot instance...")
-        bot = TwitterBot()
-        print("\n✅ Bot initialized successfully!")
-        print("\nStarting monitoring loop...")
-        bot.monitor_and_reply(interval=60 * 5)  # Check for new tweets every 5 minutes
-    except KeyboardInterrupt:
-        print("\n\n⚠️ Keyboard interrupt received. Stopping bot...")
-    except Exception as e:
-        print(f"\n\n❌ Fatal error: {str(e)}")
-        print("\nFull error traceback:")
-        print(traceback.format_exc())
-        sys.exit(1)
+        bot = TwitterBot(
+            username=account['username'],
+            password=account['password'],
+            cookies_file=account.get('cookies_file') or os.path.join(base_dir, f"cookies_{name}.json"),
+            chrome_profile=account.get('chrome_profile') or os.path.join(base_dir, f"chrome_profile_{name}"),
+            processed_tweets=dedupe,
+            metrics_file=metrics_file,
+            # CHROME_DEBUGGER_ADDRESS can't be shared between accounts; attach only per account
+            debugger_address=account.get('debugger_address', '')
+        )
+        if not bot.login():
+            result_queue.put({'worker': name, 'error': 'login failed'})
+            exit_code = WORKER_EXIT_FATAL
+            return
+        # Finish the query this account was in the middle of before it was restarted
+        query = bot.checkpoint.state.get('query')
+        if query in bot.tech_search_queries:
+            log.info("[run_account_worker] %s resuming '%s' from its checkpoint", name, query)
+            run_query(query, queued=False, resume=True)
+        while True:
+            query = query_queue.get()
+            if query is None:
+                break
+            run_query(query, queued=True)
+            query = None
+    except (Exception, SystemExit) as e:
+        log.error("[run_account_worker] %s stopped: %s", name, e)
+        result_queue.put({'worker': name, 'query': query, 'error': str(e)})
+        # SystemExit comes from TwitterBot's configuration checks
+        exit_code = WORKER_EXIT_FATAL if isinstance(e, SystemExit) else 1
     finally:
-        if 'bot' in locals():
-            print("\nCleaning up...")
+        if bot is not None:
             bot.cleanup()
-        print("\nBot stopped.")
+        if exit_code:
+            sys.exit(exit_code)
+
+
+def run_multi_account(accounts_file, interval=60 * 5, max_backoff=15 * 60):
+    """Run one worker process per account from accounts_file, sharing a query queue and a global dedupe store.
+
+    Queries are picked by a QueryScheduler and kept queued one per live worker; interval is
+    the shortest time before the same query is searched again. Crashed workers are
+    restarted with the same exponential backoff as run_supervised (up to max_backoff
+    seconds) and resume their checkpointed query; workers that exit with
+    WORKER_EXIT_FATAL stay stopped.
+
+    accounts_file is a JSON list of {"username", "password"} objects, optionally with
+    "cookies_file" and "chrome_profile"; by default each account gets its own
+    cookies_<username>.json and chrome_profile_<username> next to this script.
+    """
+    log.debug("[run_multi_account] Called with accounts file: %s", accounts_file)
+    with open(accounts_file, 'r') as f:
+        accounts = json.load(f)
+    log.info("Starting %s account workers...", len(accounts))
+
+    processed_db = os.getenv('PROCESSED_DB_FILE') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'processed_tweets.db')
+    manager = DedupeManager()
+    manager.start()
+    use_bloom = os.getenv('PROCESSED_DB_BLOOM', '').lower() in ('1', 'true', 'yes')
+    dedupe = manager.SharedDedupeStore(processed_db, use_bloom=use_bloom)
+
+    query_queue = multiprocessing.Queue()
+    result_queue = multiprocessing.Queue()
+
+    def start_worker(account):
+        worker = multiprocessing.Process(
+            target=run_account_worker,
+            args=(account, query_queue, result_queue, dedupe),
+            name=f"worker-{account['username']}"
+        )
+        worker.start()
+        return {'account': account, 'process': worker, 'started': time.time(), 'failures': 0,
+                'restart_at': None, 'query': None}
+
+    workers = {account['username']: start_worker(account) for account in accounts}
+
+    scheduler = QueryScheduler(TECH_SEARCH_QUERIES, query_stats_path(), min_revisit=interval)
+    started = time.time()
+    stats = {account['username']: {'queries': 0, 'replies': 0, 'seconds': 0.0} for account in accounts}
+    queued = 0  # put on query_queue and not yet taken by a worker
+    visits = 0
+
+    def handle(result):
+        nonlocal queued, visits
+        worker = workers[result['worker']]
+        if result.get('started'):
+            worker['query'] = result['query']
+            if result['queued']:
+                queued -= 1
+            return
+        worker['query'] = None
+        if 'error' in result:
+            log.error("Worker %s failed: %s", result['worker'], result['error'])
+            return
+
+        scheduler.record(result['query'], result['replies'], result['eligible'],
+                         result['page_loads'], result['seconds'])
+        worker_stats = stats[result['worker']]
+        worker_stats['queries'] += 1
+        worker_stats['replies'] += result['replies']
+        worker_stats['seconds'] += result['seconds']
+
+        visits += 1
+        if visits % len(TECH_SEARCH_QUERIES) == 0:
+            dedupe.evict()
+            hours = (time.time() - started) / 3600
+            log.info("=== Worker throughput ===")
+            for name, worker_stats in stats.items():
+                per_query = worker_stats['seconds'] / worker_stats['queries'] if worker_stats['queries'] else 0
+                log.info("%s: %s queries, %s replies, %.1f replies/hour, %.0fs per query",
+                         name, worker_stats['queries'], worker_stats['replies'], worker_stats['replies'] / hours, per_query)
+
+    def drain():
+        while True:
+            try:
+                handle(result_queue.get_nowait())
+            except queue.Empty:
+                return
 
-if __name__ == "__main__":
     try:
-        print("Starting main function...")
-        main()
-    except Exception as e:
-        print(f"\n\n❌ Unhandled exception: {str(e)}")
-        print(traceback.format_exc())
-        input("\nPress Enter to exit...")
-        sys.exit(1)
-    except SystemExit as e:
-        print(f"\n\n⚠️ Script exited with code: {e.code}")
-        if e.code != 0:
-            print("This indicates an error occurred during execution.")
-        input("\nPress Enter to exit...")
-        sys.exit(e.code)
+        while True:
+            now = time.time()
+            for name, worker in workers.items():
+                process = worker['process']
+                if worker['restart_at'] is not None:
+                    if now >= worker['restart_at']:
+                        log.info("Restarting worker %s...", name)
+                        workers[name] = dict(start_worker(worker['account']), failures=worker['failures'])
+                    continue
+                if process is None or process.is_alive():
+                    continue
+                # Pick up whatever it reported before exiting, then forget its query: a restarted
+                # worker resumes it from the account's checkpoint
+                drain()
+                worker['query'] = None
+                if process.exitcode in (0, WORKER_EXIT_FATAL):
+                    log.warning("Worker %s stopped (exit code %s), not restarting it", name, process.exitcode)
+                    worker['process'] = None
+                    continue
+                failures = 1 if now - worker['started'] > 60 * 60 else worker['failures'] + 1
+                backoff = min(30 * 2 ** (failures - 1), max_backoff)
+                log.error("Worker %s died (exit code %s); restarting in %.0f seconds (attempt %s)",
+                          name, process.exitcode, backoff, failures)
+                worker.update(failures=failures, restart_at=now + backoff)
+
+            live_workers = sum(worker['process'] is not None for worker in workers.values())
+            if not live_workers:
+                log.info("All account workers have stopped.")
+                return
+            # Keep one query queued or running per live (or restarting) worker
+            in_flight = queued + sum(worker['query'] is not None for worker in workers.values())
+            while in_flight < live_workers:
+                query, _ = scheduler.next_query()
+                if query is None:
+                    break
+                query_queue.put(query)
+                queued += 1
+                in_flight += 1
+
+            try:
+                handle(result_queue.get(timeout=5))
+            except queue.Empty:
+                continue
+    finally:
+        for _ in workers:
+            query_queue.put(None)
+        for worker in workers.values():
+            process = worker['process']
+            if process is None or worker['restart_at'] is not None:
+                continue
+            process.join(timeout=60)
+            if process.is_alive():
+                process.terminate()
+        dedupe.close()
+        manager.shutdown()
+
+
+def main():
+    configure_logging()
+    log.info("=== Twitter Bot starting ===")
+    log.debug("Python %s, working directory %s", sys.version, os.getcwd())
+
+    try:
+        accounts_file = os.getenv('ACCOUNTS_FILE')
+        if accounts_file:
+            check_environment(['GEMINI_API_KEY', 'ACCOUNTS_FILE'])
+            run_multi_account(accounts_file, interval=60 * 5)
+            return
+        check_environment(['TWITTER_USERNAME', 'TWITTER_PASSWORD', 'GEMINI_API_KEY', 'COOKIES_FILE'])
+
+        run_supervised(interval=60 * 5)  # Check for new tweets every 5 minutes
+    except KeyboardInterrupt:
+        log.warning("⚠️ Keyboard interrupt received. Stopping bot...")
+    log.info("Bot stopped.")
+
+
+def run_supervised(interval=60 * 5, max_backoff=15 * 60):
+    """Run the bot, restarting it (and resuming from its checkpoint) whenever it crashes.
+
+    Restarts back off exponentially up to max_backoff seconds; a run that lasted an hour
+    resets the backoff. Configuration errors (SystemExit from TwitterBot) are not retried.
+    """
+    failures = 0
+    while True:
+        bot = None
+        started = time.time()
+        try:
+            log.info("Creating TwitterBot instance...")
+            bot = TwitterBot()
+            log.info("✅ Bot initialized successfully!")
+            log.info("Starting monitoring loop...")
+            bot.monitor_and_reply(interval=interval)
+            return
+        except Exception as e:
+            log.exception("❌ Bot crashed: %s", e)
+        finally:
+            if bot is not None:
+                log.info("Cleaning up...")
+                try:
+                    bot.cleanup()
+                except Exception as e:
+                    log.warning("Cleanup failed: %s", e)
+        failures = 1 if time.time() - started > 60 * 60 else failures + 1
+        backoff = min(30 * 2 ** (failures - 1), max_backoff)
+        log.info("Restarting in %.0f seconds (attempt %s)...", backoff, failures)
+        time.sleep(backoff)
+        mark_startup()
+
+
+if __name__ == "__main__":
+    main()